@@ -1,24 +1,166 @@
+import csv
+import io
+import json
 import os
-from datetime import datetime
+import queue
+import random
+import re
+import select as select_module
+import threading
+import time
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from datetime import datetime, timedelta
 from zoneinfo import ZoneInfo  # Python 3.9+ timezone support
 
-from flask import Flask, render_template, request, redirect, url_for, jsonify
+IMPORT_STARTED = time.perf_counter()  # cold-boot clock, see create_app()
+
+import click
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+from prometheus_client.core import GaugeMetricFamily
+from flask import Flask, Response, appcontext_pushed, g, has_request_context, render_template, request, redirect, url_for, jsonify
 
 from sqlalchemy import (
     create_engine,
     Column,
     Integer,
     String,
+    Text,
     DateTime,
     ForeignKey,
+    Index,
+    event,
+    text,
+    case,
+    delete,
+    func,
+    insert,
+    literal,
+    select,
+    update,
+)
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.exc import DBAPIError, TimeoutError as PoolTimeoutError
+from sqlalchemy.orm import (
+    contains_eager,
+    declarative_base,
+    relationship,
+    selectinload,
+    sessionmaker,
 )
-from sqlalchemy.orm import declarative_base, relationship, sessionmaker
+from sqlalchemy import inspect as sa_inspect
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.pool import QueuePool
 
 app = Flask(__name__)
 
 # ---------- TIMEZONE ----------
 TORONTO_TZ = ZoneInfo("America/Toronto")
 
+# ---------- METRICS ----------
+# Prometheus text format on /metrics. Under gunicorn every worker writes its
+# samples to PROMETHEUS_MULTIPROC_DIR (set up in gunicorn.conf.py) and whichever
+# worker serves the scrape adds them all up; without it, this process only.
+# Declared ahead of the engine because pool checkouts at import already record.
+
+REQUEST_SECONDS = Histogram(
+    "http_request_duration_seconds", "Time to produce the response (headers, for streams).",
+    ["endpoint", "method", "status"],
+)
+REQUEST_STATEMENTS = Histogram(
+    "db_statements_per_request", "SQL statements executed while handling a request.",
+    ["endpoint"], buckets=(0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 89),
+)
+REQUEST_DB_SECONDS = Histogram(
+    "db_seconds_per_request", "Time spent in SQL statements while handling a request.",
+    ["endpoint"], buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5),
+)
+DB_STATEMENT_SECONDS = Histogram(
+    "db_statement_duration_seconds", "Duration of individual SQL statements.",
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0),
+)
+DB_POOL_WAIT = Histogram(
+    "db_pool_checkout_wait_seconds", "Time spent waiting for a pooled connection.", ["outcome"],
+    buckets=(0.0001, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 30.0),
+)
+DB_POOL_CONNECTIONS = Gauge(
+    "db_pool_connections", "Pooled connections by state, summed over live workers.",
+    ["state"], multiprocess_mode="livesum",
+)
+ORDER_EVENTS = Counter(
+    "order_events_total", "Committed order state changes, by kitchen event.", ["event"],
+)
+APP_STARTUP_SECONDS = Gauge(
+    "app_startup_seconds", "Seconds from import to app ready (boot) and to the first response.",
+    ["phase"], multiprocess_mode="max",
+)
+
+
+@app.before_request
+def _start_request_timer():
+    g.request_started = time.perf_counter()
+
+
+@app.after_request
+def _record_request_metrics(response):
+    started = g.get("request_started")
+    if started is None:
+        return response
+    endpoint = request.endpoint or "unmatched"
+    REQUEST_SECONDS.labels(endpoint, request.method, str(response.status_code)).observe(
+        time.perf_counter() - started
+    )
+    counter = g.get("query_counter")
+    if counter is not None:
+        REQUEST_STATEMENTS.labels(endpoint).observe(counter.count)
+        REQUEST_DB_SECONDS.labels(endpoint).observe(counter.seconds)
+    pool = engine.pool
+    if isinstance(pool, QueuePool):
+        DB_POOL_CONNECTIONS.labels("checked_out").set(pool.checkedout())
+        DB_POOL_CONNECTIONS.labels("idle").set(pool.checkedin())
+        DB_POOL_CONNECTIONS.labels("overflow").set(max(pool.overflow(), 0))
+    return response
+
+
+class OrderStateCollector:
+    """Orders in the live tables by status, counted at scrape time."""
+
+    def describe(self):
+        return []  # don't query at registration
+
+    def collect(self):
+        family = GaugeMetricFamily("orders_live", "Orders in the live tables by status.", labels=["status"])
+        with engine.connect() as conn:
+            for status, count in conn.execute(
+                select(Order.status, func.count()).group_by(Order.status)
+            ):
+                family.add_metric([status or ""], count)
+        yield family
+
+
+order_state_collector = OrderStateCollector()
+REGISTRY.register(order_state_collector)
+
+
+@app.route("/metrics")
+def metrics():
+    registry = REGISTRY
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        registry.register(order_state_collector)
+    return Response(generate_latest(registry), mimetype=CONTENT_TYPE_LATEST)
+
+
 # ---------- DATABASE SETUP ----------
 
 def get_database_url():
@@ -36,9 +178,178 @@ def get_database_url():
     return "sqlite:///orders.db"
 
 
+def env_flag(name: str, default: bool) -> bool:
+    value = os.environ.get(name)
+    if value is None:
+        return default
+    return value.strip().lower() in ("1", "true", "yes", "on")
+
+
+class PoolStats:
+    """Process-wide connection pool counters (checkouts, wait time, timeouts)."""
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.timeouts = 0
+        self.wait_seconds_total = 0.0
+        self.wait_seconds_max = 0.0
+
+    def record_wait(self, seconds: float, timed_out: bool = False):
+        with self._lock:
+            if timed_out:
+                self.timeouts += 1
+            else:
+                self.checkouts += 1
+            self.wait_seconds_total += seconds
+            self.wait_seconds_max = max(self.wait_seconds_max, seconds)
+        DB_POOL_WAIT.labels(outcome="timeout" if timed_out else "ok").observe(seconds)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "checkouts": self.checkouts,
+                "timeouts": self.timeouts,
+                "wait_seconds_total": round(self.wait_seconds_total, 6),
+                "wait_seconds_max": round(self.wait_seconds_max, 6),
+            }
+
+
+pool_stats = PoolStats()
+
+
+class InstrumentedQueuePool(QueuePool):
+    """QueuePool that times how long each checkout waits for a connection."""
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            conn = super()._do_get()
+        except PoolTimeoutError:
+            pool_stats.record_wait(time.perf_counter() - start, timed_out=True)
+            raise
+        pool_stats.record_wait(time.perf_counter() - start)
+        return conn
+
+
+def engine_options(url: str) -> dict:
+    """
+    Pool settings from the environment. Each worker process holds up to
+    DB_POOL_SIZE + DB_MAX_OVERFLOW connections, so size them against
+    (gunicorn workers x dynos) and the Postgres connection limit.
+    """
+    options = {"echo": False, "future": True}
+    if url.startswith("sqlite") and ":memory:" in url:
+        return options
+    options.update(
+        poolclass=InstrumentedQueuePool,
+        pool_size=int(os.environ.get("DB_POOL_SIZE", "5")),
+        max_overflow=int(os.environ.get("DB_MAX_OVERFLOW", "5")),
+        pool_timeout=float(os.environ.get("DB_POOL_TIMEOUT", "10")),
+        pool_recycle=int(os.environ.get("DB_POOL_RECYCLE", "1800")),
+        pool_pre_ping=env_flag("DB_POOL_PRE_PING", True),
+    )
+    return options
+
+
 DATABASE_URL = get_database_url()
-engine = create_engine(DATABASE_URL, echo=False, future=True)
-SessionLocal = sessionmaker(bind=engine, autoflush=False, autocommit=False)
+DATABASE_BACKEND = make_url(DATABASE_URL).get_backend_name()
+
+# Created by init_engine() from create_app(), not at import, so importing this
+# module never touches the database. Engine event listeners below are attached
+# to the Engine class for the same reason.
+engine = None
+_engine_lock = threading.Lock()
+
+
+def init_engine():
+    global engine
+    with _engine_lock:
+        if engine is None:
+            engine = create_engine(DATABASE_URL, **engine_options(DATABASE_URL))
+            SessionLocal.configure(bind=engine)
+    return engine
+
+
+def _reset_pool_after_fork():
+    # Connections inherited from the parent (gunicorn --preload) must never be
+    # used by the child; drop them without closing the parent's sockets.
+    if engine is not None:
+        engine.dispose(close=False)
+    pool_stats.reset()
+
+
+os.register_at_fork(after_in_child=_reset_pool_after_fork)
+
+
+# ---------- SQLITE MODE ----------
+# Used when DATABASE_URL is unset. WAL lets readers run alongside the single
+# writer; busy_timeout makes writers queue instead of failing with
+# "database is locked".
+
+SQLITE_PRAGMAS = {
+    "journal_mode": "WAL",
+    "busy_timeout": int(os.environ.get("SQLITE_BUSY_TIMEOUT_MS", "5000")),
+    "synchronous": "NORMAL",
+    "cache_size": -int(os.environ.get("SQLITE_CACHE_KB", "65536")),  # negative = KiB
+    "mmap_size": int(os.environ.get("SQLITE_MMAP_BYTES", str(256 * 1024 * 1024))),
+    "temp_store": "MEMORY",
+}
+
+IS_SQLITE = DATABASE_BACKEND == "sqlite"
+
+if IS_SQLITE:
+    @event.listens_for(Engine, "connect")
+    def _sqlite_on_connect(dbapi_conn, connection_record):
+        # take over BEGIN from pysqlite so write transactions can use IMMEDIATE
+        dbapi_conn.isolation_level = None
+        cursor = dbapi_conn.cursor()
+        for name, value in SQLITE_PRAGMAS.items():
+            cursor.execute(f"PRAGMA {name}={value}")
+        cursor.close()
+
+    @event.listens_for(Engine, "begin")
+    def _sqlite_on_begin(conn):
+        # A deferred transaction that reads first and then writes cannot wait for
+        # the write lock (SQLITE_BUSY_SNAPSHOT); write sessions lock up front.
+        mode = conn.get_execution_options().get("sqlite_begin", "DEFERRED")
+        conn.connection.driver_connection.execute(f"BEGIN {mode}")
+
+
+def write_session():
+    """Session for a read-modify-write transaction (BEGIN IMMEDIATE on SQLite)."""
+    session = SessionLocal()
+    if IS_SQLITE:
+        session.connection(execution_options={"sqlite_begin": "IMMEDIATE"})
+    return session
+
+
+@contextmanager
+def write_transaction(bind=None):
+    """Like engine.begin(), for read-then-write work outside a session (BEGIN IMMEDIATE on SQLite)."""
+    with (bind or engine).connect() as conn:
+        with conn.execution_options(sqlite_begin="IMMEDIATE").begin():
+            yield conn
+
+
+def pool_status() -> dict:
+    pool = engine.pool
+    status = {"pool": type(pool).__name__, "pid": os.getpid()}
+    if isinstance(pool, QueuePool):
+        status.update(
+            size=pool.size(),
+            checked_out=pool.checkedout(),
+            idle=pool.checkedin(),
+            overflow=pool.overflow(),
+            max_overflow=pool._max_overflow,
+        )
+    status.update(pool_stats.snapshot())
+    return status
+
+SessionLocal = sessionmaker(autoflush=False, autocommit=False)  # bound by init_engine()
 Base = declarative_base()
 
 
@@ -66,20 +377,33 @@ class Order(Base):
         cascade="all, delete-orphan",
     )
 
+    __table_args__ = (
+        # kitchen feed and reviews filter by status and sort by id
+        Index("ix_orders_status_id", "status", "id"),
+        # archived orders keep their ids, so SQLite must never hand one out again
+        {"sqlite_autoincrement": True},
+    )
+
 
 class OrderItem(Base):
     __tablename__ = "order_items"
 
     id = Column(Integer, primary_key=True, index=True)
-    order_id = Column(Integer, ForeignKey("orders.id"))
+    order_id = Column(Integer, ForeignKey("orders.id"), index=True)
     item_id = Column(Integer)
     name = Column(String(100))
     category_id = Column(String(50))
     category_name = Column(String(100))
     qty = Column(Integer)
+    # each station confirms and finishes its own lines: new -> confirmed -> done
+    status = Column(String(20), default="new", server_default="new")
 
     order = relationship("Order", back_populates="items")
 
+    __table_args__ = (
+        {"sqlite_autoincrement": True},
+    )
+
 
 class Review(Base):
     __tablename__ = "reviews"
@@ -93,8 +417,812 @@ class Review(Base):
     order = relationship("Order", back_populates="review")
 
 
-# Create tables if they don't exist (this will add the `reviews` table)
-Base.metadata.create_all(bind=engine)
+# ---------- ARCHIVE TABLES ----------
+# Cold copies of finished orders moved out of the live tables by
+# archive_orders(). Ids are kept, so an order keeps its number forever.
+
+class ArchivedOrder(Base):
+    __tablename__ = "archived_orders"
+
+    id = Column(Integer, primary_key=True, autoincrement=False)
+    customer_name = Column(String(100))
+    table = Column(String(50))
+    status = Column(String(20))
+    created_at = Column(DateTime(timezone=True))
+    archived_at = Column(DateTime(timezone=True))
+
+    items = relationship(
+        "ArchivedOrderItem",
+        back_populates="order",
+        cascade="all, delete-orphan",
+        order_by="ArchivedOrderItem.id",
+    )
+    review = relationship(
+        "ArchivedReview",
+        uselist=False,
+        back_populates="order",
+        cascade="all, delete-orphan",
+    )
+
+    __table_args__ = (
+        Index("ix_archived_orders_status_id", "status", "id"),
+    )
+
+
+class ArchivedOrderItem(Base):
+    __tablename__ = "archived_order_items"
+
+    id = Column(Integer, primary_key=True, autoincrement=False)
+    order_id = Column(Integer, ForeignKey("archived_orders.id"), index=True)
+    item_id = Column(Integer)
+    name = Column(String(100))
+    category_id = Column(String(50))
+    category_name = Column(String(100))
+    qty = Column(Integer)
+
+    order = relationship("ArchivedOrder", back_populates="items")
+
+
+class ArchivedReview(Base):
+    __tablename__ = "archived_reviews"
+
+    # one review per order, so the order id is the key (reviews written after
+    # archiving have no live review id)
+    order_id = Column(Integer, ForeignKey("archived_orders.id"), primary_key=True, autoincrement=False)
+    rating = Column(Integer)
+    comment = Column(String(1000))
+    created_at = Column(DateTime(timezone=True))
+
+    order = relationship("ArchivedOrder", back_populates="review")
+
+
+# ---------- ANALYTICS ROLLUPS ----------
+# Maintained incrementally when an order is marked done and when a review is
+# written; rebuilt from history with `flask --app app backfill-rollups`.
+
+class SalesHourly(Base):
+    """Quantity sold per menu item per hour (Toronto time, by order time)."""
+    __tablename__ = "sales_hourly"
+
+    hour = Column(DateTime(timezone=True), primary_key=True)
+    item_id = Column(Integer, primary_key=True, autoincrement=False)
+    name = Column(String(100))
+    category_id = Column(String(50), index=True)
+    category_name = Column(String(100))
+    qty = Column(Integer, nullable=False, default=0)
+    orders = Column(Integer, nullable=False, default=0)
+
+
+class SalesDaily(Base):
+    """sales_hourly summed per Toronto day, for the per-day/item/category reports over long ranges."""
+    __tablename__ = "sales_daily"
+
+    day = Column(DateTime(timezone=True), primary_key=True)
+    item_id = Column(Integer, primary_key=True, autoincrement=False)
+    name = Column(String(100))
+    category_id = Column(String(50), index=True)
+    category_name = Column(String(100))
+    qty = Column(Integer, nullable=False, default=0)
+    orders = Column(Integer, nullable=False, default=0)
+
+
+class RatingRollup(Base):
+    """Review count and rating sum per scope: ('all', '*'), ('category', id), ('item', id)."""
+    __tablename__ = "rating_rollups"
+
+    scope = Column(String(20), primary_key=True)
+    key = Column(String(50), primary_key=True)
+    reviews = Column(Integer, nullable=False, default=0)
+    rating_sum = Column(Integer, nullable=False, default=0)
+
+
+class ChangeVersion(Base):
+    """
+    Single-row counter bumped inside every order write.
+
+    The row lock taken by the UPDATE makes versions follow commit order,
+    which a plain autoincrement/sequence does not guarantee.
+    kitchen_value is the version of the last change to the active orders
+    (not e.g. a review), which is what kitchen caches and ETags key on.
+    """
+    __tablename__ = "change_versions"
+
+    id = Column(Integer, primary_key=True)
+    value = Column(Integer, nullable=False, default=0)
+    kitchen_value = Column(Integer, nullable=False, default=0, server_default="0")
+
+
+class OrderChange(Base):
+    """Log of which order changed at which version, for `/api/orders?since=`."""
+    __tablename__ = "order_changes"
+
+    version = Column(Integer, primary_key=True, autoincrement=False)
+    order_id = Column(Integer, index=True)
+    status = Column(String(20))
+    events = Column(Text)  # JSON list of [event, data] published by this write
+
+
+class SchemaMigration(Base):
+    __tablename__ = "schema_migrations"
+
+    version = Column(Integer, primary_key=True, autoincrement=False)
+    name = Column(String(200))
+    applied_at = Column(DateTime(timezone=True))
+
+
+# ---------- SCHEMA MIGRATIONS ----------
+# Run once per deploy (`flask --app app migrate`, the Procfile release step),
+# not per worker: workers only check the latest applied version (create_app()).
+# MIGRATIONS is the only thing that creates or changes tables (the models just
+# describe the result; tests/test_migrations.py checks they agree), so every
+# schema change, new tables included, needs a migration here.
+# Steps are SQL strings or callables taking a Connection; never edit a
+# migration that has shipped, append a new one.
+
+def add_column_if_missing(table: str, column: str, ddl_type: str):
+    """Migration step: ALTER TABLE ... ADD COLUMN, skipped if the column exists (databases once built by create_all)."""
+    def step(conn):
+        existing = {col["name"] for col in sa_inspect(conn).get_columns(table)}
+        if column not in existing:
+            conn.execute(text(f"ALTER TABLE {table} ADD COLUMN {column} {ddl_type}"))
+    return step
+
+
+def sql_with_types(sql: str):
+    """
+    Migration step: SQL with {timestamptz}, {serial_pk} and {autoincrement_pk}
+    spelled for the connection's dialect. AUTOINCREMENT keeps SQLite from
+    handing out an id again once its row is gone (see migration 4).
+    """
+    def step(conn):
+        postgres = conn.dialect.name == "postgresql"
+        conn.execute(text(sql.format(
+            timestamptz="TIMESTAMP WITH TIME ZONE" if postgres else "DATETIME",
+            serial_pk="SERIAL PRIMARY KEY" if postgres else "INTEGER PRIMARY KEY",
+            autoincrement_pk="SERIAL PRIMARY KEY" if postgres else "INTEGER PRIMARY KEY AUTOINCREMENT",
+        )))
+    return step
+
+
+# The ledger itself, created before anything else is looked up in it.
+SCHEMA_MIGRATIONS_DDL = sql_with_types("""CREATE TABLE IF NOT EXISTS schema_migrations (
+    version INTEGER PRIMARY KEY,
+    name VARCHAR(200),
+    applied_at {timestamptz}
+)""")
+
+
+# Live tables whose ids carry over into the archive, and the archive table that holds them.
+ARCHIVED_ID_TABLES = {"orders": "archived_orders", "order_items": "archived_order_items"}
+
+
+def bump_sqlite_sequence(conn, table: str, floor: int):
+    """Make sure SQLite's AUTOINCREMENT for `table` never hands out an id <= floor."""
+    if conn.dialect.name != "sqlite" or not floor:
+        return
+    seq = conn.execute(text("SELECT seq FROM sqlite_sequence WHERE name = :t"), {"t": table}).first()
+    if seq is None:
+        conn.execute(text("INSERT INTO sqlite_sequence (name, seq) VALUES (:t, :floor)"),
+                     {"t": table, "floor": floor})
+    elif seq[0] < floor:
+        conn.execute(text("UPDATE sqlite_sequence SET seq = :floor WHERE name = :t"),
+                     {"t": table, "floor": floor})
+
+
+def sqlite_rebuild_with_autoincrement(table: str, ddl: str, columns: str, indexes: list):
+    """
+    Migration step (SQLite only): recreate `table` from `ddl` with AUTOINCREMENT so
+    ids freed by archiving are never reused, then start its sequence past the
+    archive's ids. Skipped if the table already has AUTOINCREMENT.
+    """
+    def step(conn):
+        if conn.dialect.name != "sqlite":
+            return  # serial sequences never go backwards
+        sql = conn.execute(
+            text("SELECT sql FROM sqlite_master WHERE type = 'table' AND name = :t"), {"t": table}
+        ).scalar()
+        if "AUTOINCREMENT" not in sql.upper():
+            conn.execute(text(ddl.format(table=f"{table}_new")))
+            conn.execute(text(f"INSERT INTO {table}_new ({columns}) SELECT {columns} FROM {table}"))
+            conn.execute(text(f"DROP TABLE {table}"))
+            conn.execute(text(f"ALTER TABLE {table}_new RENAME TO {table}"))
+            for index in indexes:
+                conn.execute(text(index))
+        archive = ARCHIVED_ID_TABLES[table]
+        floor = max(
+            conn.execute(text(f"SELECT MAX(id) FROM {table}")).scalar() or 0,
+            conn.execute(text(f"SELECT MAX(id) FROM {archive}")).scalar() or 0,
+        )
+        bump_sqlite_sequence(conn, table, floor)
+    return step
+
+
+def fill_sales_daily(conn):
+    """Migration step: build sales_daily from whatever sales_hourly already holds."""
+    hourly = [dict(r._mapping) for r in conn.execute(select(SalesHourly.__table__))]
+    rows = daily_sales_rows(hourly)
+    if rows:
+        conn.execute(SalesDaily.__table__.insert(), rows)
+
+
+MIGRATIONS = [
+    # The tables as they were before migration 1 (older databases have them
+    # already, so this is a no-op there); later columns come from later migrations.
+    (0, "baseline tables", [
+        sql_with_types("""CREATE TABLE IF NOT EXISTS orders (
+            id {autoincrement_pk},
+            customer_name VARCHAR(100),
+            "table" VARCHAR(50),
+            status VARCHAR(20),
+            created_at {timestamptz}
+        )"""),
+        "CREATE INDEX IF NOT EXISTS ix_orders_id ON orders (id)",
+        sql_with_types("""CREATE TABLE IF NOT EXISTS order_items (
+            id {autoincrement_pk},
+            order_id INTEGER REFERENCES orders (id),
+            item_id INTEGER,
+            name VARCHAR(100),
+            category_id VARCHAR(50),
+            category_name VARCHAR(100),
+            qty INTEGER
+        )"""),
+        "CREATE INDEX IF NOT EXISTS ix_order_items_id ON order_items (id)",
+        sql_with_types("""CREATE TABLE IF NOT EXISTS reviews (
+            id {serial_pk},
+            order_id INTEGER UNIQUE REFERENCES orders (id),
+            rating INTEGER,
+            comment VARCHAR(1000),
+            created_at {timestamptz}
+        )"""),
+        "CREATE INDEX IF NOT EXISTS ix_reviews_id ON reviews (id)",
+        sql_with_types("""CREATE TABLE IF NOT EXISTS change_versions (
+            id {serial_pk},
+            value INTEGER NOT NULL
+        )"""),
+        """CREATE TABLE IF NOT EXISTS order_changes (
+            version INTEGER PRIMARY KEY,
+            order_id INTEGER,
+            status VARCHAR(20)
+        )""",
+        "CREATE INDEX IF NOT EXISTS ix_order_changes_order_id ON order_changes (order_id)",
+    ]),
+    (1, "orders(status, id) and order_items(order_id) indexes", [
+        "CREATE INDEX IF NOT EXISTS ix_orders_status_id ON orders (status, id)",
+        "CREATE INDEX IF NOT EXISTS ix_order_items_order_id ON order_items (order_id)",
+    ]),
+    (2, "order_changes.events payload for the change bus", [
+        add_column_if_missing("order_changes", "events", "TEXT"),
+    ]),
+    (3, "archive and analytics rollup tables", [
+        sql_with_types("""CREATE TABLE IF NOT EXISTS archived_orders (
+            id INTEGER NOT NULL,
+            customer_name VARCHAR(100),
+            "table" VARCHAR(50),
+            status VARCHAR(20),
+            created_at {timestamptz},
+            archived_at {timestamptz},
+            PRIMARY KEY (id)
+        )"""),
+        "CREATE INDEX IF NOT EXISTS ix_archived_orders_status_id ON archived_orders (status, id)",
+        """CREATE TABLE IF NOT EXISTS archived_order_items (
+            id INTEGER NOT NULL,
+            order_id INTEGER,
+            item_id INTEGER,
+            name VARCHAR(100),
+            category_id VARCHAR(50),
+            category_name VARCHAR(100),
+            qty INTEGER,
+            PRIMARY KEY (id),
+            FOREIGN KEY (order_id) REFERENCES archived_orders (id)
+        )""",
+        "CREATE INDEX IF NOT EXISTS ix_archived_order_items_order_id ON archived_order_items (order_id)",
+        sql_with_types("""CREATE TABLE IF NOT EXISTS archived_reviews (
+            order_id INTEGER NOT NULL,
+            rating INTEGER,
+            comment VARCHAR(1000),
+            created_at {timestamptz},
+            PRIMARY KEY (order_id),
+            FOREIGN KEY (order_id) REFERENCES archived_orders (id)
+        )"""),
+        sql_with_types("""CREATE TABLE IF NOT EXISTS sales_hourly (
+            hour {timestamptz} NOT NULL,
+            item_id INTEGER NOT NULL,
+            name VARCHAR(100),
+            category_id VARCHAR(50),
+            category_name VARCHAR(100),
+            qty INTEGER NOT NULL,
+            orders INTEGER NOT NULL,
+            PRIMARY KEY (hour, item_id)
+        )"""),
+        "CREATE INDEX IF NOT EXISTS ix_sales_hourly_category_id ON sales_hourly (category_id)",
+        """CREATE TABLE IF NOT EXISTS rating_rollups (
+            scope VARCHAR(20) NOT NULL,
+            "key" VARCHAR(50) NOT NULL,
+            reviews INTEGER NOT NULL,
+            rating_sum INTEGER NOT NULL,
+            PRIMARY KEY (scope, "key")
+        )""",
+    ]),
+    (4, "never reuse order and order item ids on SQLite", [
+        sqlite_rebuild_with_autoincrement(
+            "orders",
+            """CREATE TABLE {table} (
+                id INTEGER NOT NULL PRIMARY KEY AUTOINCREMENT,
+                customer_name VARCHAR(100),
+                "table" VARCHAR(50),
+                status VARCHAR(20),
+                created_at DATETIME
+            )""",
+            'id, customer_name, "table", status, created_at',
+            [
+                "CREATE INDEX ix_orders_id ON orders (id)",
+                "CREATE INDEX ix_orders_status_id ON orders (status, id)",
+            ],
+        ),
+        sqlite_rebuild_with_autoincrement(
+            "order_items",
+            """CREATE TABLE {table} (
+                id INTEGER NOT NULL PRIMARY KEY AUTOINCREMENT,
+                order_id INTEGER REFERENCES orders (id),
+                item_id INTEGER,
+                name VARCHAR(100),
+                category_id VARCHAR(50),
+                category_name VARCHAR(100),
+                qty INTEGER
+            )""",
+            "id, order_id, item_id, name, category_id, category_name, qty",
+            [
+                "CREATE INDEX ix_order_items_id ON order_items (id)",
+                "CREATE INDEX ix_order_items_order_id ON order_items (order_id)",
+            ],
+        ),
+    ]),
+    (5, "order_items.status for per-station confirm and done", [
+        add_column_if_missing("order_items", "status", "VARCHAR(20) DEFAULT 'new'"),
+        "UPDATE order_items SET status = (SELECT status FROM orders WHERE orders.id = order_items.order_id) "
+        "WHERE order_id IN (SELECT id FROM orders WHERE status IN ('confirmed', 'done'))",
+    ]),
+    (6, "change_versions.kitchen_value so reviews don't invalidate kitchen caches", [
+        add_column_if_missing("change_versions", "kitchen_value", "INTEGER NOT NULL DEFAULT 0"),
+        "UPDATE change_versions SET kitchen_value = value",
+    ]),
+    (7, "sales_daily rollup, filled from sales_hourly", [
+        sql_with_types("""CREATE TABLE IF NOT EXISTS sales_daily (
+            day {timestamptz} NOT NULL,
+            item_id INTEGER NOT NULL,
+            name VARCHAR(100),
+            category_id VARCHAR(50),
+            category_name VARCHAR(100),
+            qty INTEGER NOT NULL,
+            orders INTEGER NOT NULL,
+            PRIMARY KEY (day, item_id)
+        )"""),
+        "CREATE INDEX IF NOT EXISTS ix_sales_daily_category_id ON sales_daily (category_id)",
+        fill_sales_daily,
+    ]),
+]
+
+# arbitrary key for pg_advisory_xact_lock so concurrent workers migrate one at a time
+MIGRATION_LOCK_KEY = 7204110
+
+
+def run_migrations(bind=None) -> list:
+    """Apply pending MIGRATIONS in order, each in its own transaction. Returns applied versions."""
+    applied = []
+    for index, (version, name, steps) in enumerate(MIGRATIONS):
+        with write_transaction(bind) as conn:
+            if conn.dialect.name == "postgresql":
+                conn.execute(text("SELECT pg_advisory_xact_lock(:key)"), {"key": MIGRATION_LOCK_KEY})
+            if index == 0:
+                SCHEMA_MIGRATIONS_DDL(conn)
+            done = conn.execute(
+                select(SchemaMigration.version).where(SchemaMigration.version == version)
+            ).first()
+            if done:
+                continue
+            for step in steps:
+                if callable(step):
+                    step(conn)
+                else:
+                    conn.execute(text(step))
+            conn.execute(
+                SchemaMigration.__table__.insert().values(
+                    version=version, name=name, applied_at=datetime.now(TORONTO_TZ)
+                )
+            )
+        applied.append(version)
+    return applied
+
+
+def schema_is_current() -> bool:
+    """One cheap query: has the newest migration been applied?"""
+    try:
+        with engine.connect() as conn:
+            latest = conn.execute(select(func.max(SchemaMigration.version))).scalar()
+    except DBAPIError:
+        return False  # no schema_migrations table yet
+    return latest == MIGRATIONS[-1][0]
+
+
+def prepare_database() -> list:
+    """The once-per-deploy schema step: migrations and the change counter row."""
+    applied = run_migrations()
+    ensure_change_version_row()
+    return applied
+
+
+@app.cli.command("migrate")
+def migrate_command():
+    """Apply pending schema migrations."""
+    init_engine()
+    applied = prepare_database()
+    print(f"Applied migrations: {applied}" if applied else "Schema is up to date.")
+
+
+def ensure_change_version_row():
+    session = SessionLocal()
+    try:
+        if session.get(ChangeVersion, 1) is None:
+            session.add(ChangeVersion(id=1, value=0))
+            session.commit()
+    except Exception:
+        # another worker inserted it first
+        session.rollback()
+    finally:
+        session.close()
+
+
+# Number of versions kept in `order_changes`; older cursors get a full resync.
+ORDER_CHANGE_RETENTION = int(os.environ.get("ORDER_CHANGE_RETENTION", "5000"))
+
+
+def record_order_change(session, order_id: int, status: str, events=()) -> int:
+    """
+    Allocate the next change version for an order write and queue its events
+    for the change bus. Call before commit; the events go out only if the
+    transaction commits. The kitchen version moves too if any event is a
+    kitchen one.
+    """
+    events = [list(e) for e in events]
+    bump = {"value": ChangeVersion.value + 1}
+    if any(name in KITCHEN_EVENTS for name, _ in events):
+        bump["kitchen_value"] = ChangeVersion.value + 1
+    version = session.execute(
+        update(ChangeVersion)
+        .where(ChangeVersion.id == 1)
+        .values(**bump)
+        .returning(ChangeVersion.value)
+    ).scalar_one()
+    session.execute(
+        OrderChange.__table__.insert().values(
+            version=version,
+            order_id=order_id,
+            status=status,
+            events=json.dumps(events),
+        )
+    )
+    session.info.setdefault("pending_changes", []).append((version, events))
+    change_bus.before_commit(session, version)
+
+    if version % 500 == 0:
+        session.execute(
+            OrderChange.__table__.delete().where(
+                OrderChange.version <= version - ORDER_CHANGE_RETENTION
+            )
+        )
+    return version
+
+
+def current_change_version(session) -> int:
+    return session.execute(
+        select(ChangeVersion.value).where(ChangeVersion.id == 1)
+    ).scalar_one()
+
+
+def current_kitchen_version(session) -> int:
+    """Version of the last change to the active orders: what the kitchen views are as of."""
+    return session.execute(
+        select(ChangeVersion.kitchen_value).where(ChangeVersion.id == 1)
+    ).scalar_one()
+
+# ---------- ROLLUP MAINTENANCE ----------
+
+def upsert_increment(session, table, key_columns, counter_columns, rows):
+    """INSERT rows, adding counter columns onto existing rows with the same key."""
+    if not rows:
+        return
+    dialect = postgresql if engine.dialect.name == "postgresql" else sqlite
+    stmt = dialect.insert(table)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=key_columns,
+        set_={col: table.c[col] + stmt.excluded[col] for col in counter_columns},
+    )
+    session.execute(stmt, rows)
+
+
+def stored_local_time(dt_obj: datetime) -> datetime:
+    """
+    A stored timestamp as an aware Toronto datetime. SQLite hands back the
+    Toronto wall-clock time we stored, without tzinfo.
+    """
+    if dt_obj.tzinfo is None:
+        dt_obj = dt_obj.replace(tzinfo=TORONTO_TZ)
+    return dt_obj.astimezone(TORONTO_TZ)
+
+
+def local_hour(dt_obj: datetime) -> datetime:
+    """Start of the Toronto-local hour containing dt_obj."""
+    return stored_local_time(dt_obj).replace(minute=0, second=0, microsecond=0)
+
+
+def local_day(dt_obj: datetime) -> datetime:
+    """Start of the Toronto-local day containing dt_obj."""
+    return stored_local_time(dt_obj).replace(hour=0, minute=0, second=0, microsecond=0)
+
+
+def sales_rows(lines) -> list:
+    """
+    Fold (created_at, item_id, name, category_id, category_name, qty, order_id)
+    lines into sales_hourly increments.
+    """
+    rows = {}
+    for created_at, item_id, name, category_id, category_name, qty, order_id in lines:
+        if created_at is None:
+            continue
+        key = (local_hour(created_at), item_id)
+        row = rows.get(key)
+        if row is None:
+            row = rows[key] = {
+                "hour": key[0],
+                "item_id": item_id,
+                "name": name,
+                "category_id": category_id,
+                "category_name": category_name,
+                "qty": 0,
+                "orders": 0,
+                "_orders": set(),
+            }
+        row["qty"] += qty or 0
+        row["_orders"].add(order_id)
+    for row in rows.values():
+        row["orders"] = len(row.pop("_orders"))
+    return list(rows.values())
+
+
+def daily_sales_rows(hourly_rows) -> list:
+    """
+    Fold sales_hourly increments into sales_daily increments. An order sits in
+    exactly one hour, so summing the hourly order counts doesn't double count.
+    """
+    rows = {}
+    for hourly in hourly_rows:
+        key = (local_day(hourly["hour"]), hourly["item_id"])
+        row = rows.get(key)
+        if row is None:
+            row = rows[key] = {
+                "day": key[0],
+                "item_id": hourly["item_id"],
+                "name": hourly["name"],
+                "category_id": hourly["category_id"],
+                "category_name": hourly["category_name"],
+                "qty": 0,
+                "orders": 0,
+            }
+        row["qty"] += hourly["qty"]
+        row["orders"] += hourly["orders"]
+    return list(rows.values())
+
+
+def rollup_sales(session, rows):
+    """Apply sales_rows() increments to sales_hourly and, summed per day, to sales_daily."""
+    upsert_increment(session, SalesHourly.__table__, ["hour", "item_id"], ["qty", "orders"], rows)
+    upsert_increment(session, SalesDaily.__table__, ["day", "item_id"], ["qty", "orders"], daily_sales_rows(rows))
+
+
+def rating_rows(lines) -> list:
+    """
+    Fold (review_delta, rating_delta, order_id, item_id, category_id) lines into
+    rating_rollups increments. Each order counts once per scope key.
+    """
+    totals = {}
+    seen = set()
+    for review_delta, rating_delta, order_id, item_id, category_id in lines:
+        for key in (("all", "*"), ("category", str(category_id)), ("item", str(item_id))):
+            if (order_id, key) in seen:
+                continue
+            seen.add((order_id, key))
+            count, total = totals.get(key, (0, 0))
+            totals[key] = (count + review_delta, total + rating_delta)
+    return [
+        {"scope": scope, "key": key, "reviews": count, "rating_sum": total}
+        for (scope, key), (count, total) in totals.items()
+    ]
+
+
+def rollup_ratings(session, rows):
+    upsert_increment(session, RatingRollup.__table__, ["scope", "key"], ["reviews", "rating_sum"], rows)
+
+
+# ---------- QUERY COUNTING ----------
+
+_query_counters = threading.local()
+
+
+class QueryCounter:
+    """
+    Counts SQL statements executed on the current thread while active.
+
+        with QueryCounter() as qc:
+            client.get("/reviews")
+        assert qc.count <= QUERY_BUDGETS["reviews_page"]
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+        self.statements = []
+
+    def __enter__(self):
+        if not hasattr(_query_counters, "stack"):
+            _query_counters.stack = []
+        _query_counters.stack.append(self)
+        return self
+
+    def __exit__(self, *exc):
+        _query_counters.stack.remove(self)
+        return False
+
+
+@contextmanager
+def queries_not_counted():
+    """For per-process setup that happens to run during a request: not that request's budget."""
+    stack = getattr(_query_counters, "stack", [])
+    _query_counters.stack = []
+    try:
+        yield
+    finally:
+        _query_counters.stack = stack
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _count_query(conn, cursor, statement, parameters, context, executemany):
+    context._query_started = time.perf_counter()
+    for counter in getattr(_query_counters, "stack", ()):
+        counter.count += 1
+        counter.statements.append(statement)
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _time_query(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - context._query_started
+    DB_STATEMENT_SECONDS.observe(elapsed)
+    for counter in getattr(_query_counters, "stack", ()):
+        counter.seconds += elapsed
+
+
+# Max statements per request, by endpoint. Must not grow with the number of rows.
+QUERY_BUDGETS = {
+    "api_orders": 5,  # version, [min version, changed ids,] orders, items
+    "api_orders_stream": 3,  # version, orders, items
+    "reviews_page": 8,  # pending/reviewed x live/archive, orders + items each
+    "api_reviews": 8,
+    "api_prep": 2,  # version, grouped lines
+}
+
+
+@app.before_request
+def _start_query_count():
+    g.query_counter = QueryCounter().__enter__()
+
+
+@app.after_request
+def _report_query_count(response):
+    counter = g.get("query_counter")
+    if counter is None:
+        return response
+    if app.debug or app.testing:
+        response.headers["X-Query-Count"] = str(counter.count)
+    budget = QUERY_BUDGETS.get(request.endpoint)
+    if budget is not None and counter.count > budget:
+        app.logger.warning(
+            "%s ran %d queries (budget %d)", request.endpoint, counter.count, budget
+        )
+    return response
+
+
+@app.teardown_request
+def _stop_query_count(exc):
+    counter = g.pop("query_counter", None)
+    if counter is not None:
+        counter.__exit__(None, None, None)
+
+
+# ---------- SLOW QUERY LOG ----------
+# Opt in with SLOW_QUERY_MS=<threshold>. Statements slower than that are logged
+# with their parameters, endpoint and duration. The first time a statement shape
+# is slow its plan is logged too: EXPLAIN QUERY PLAN on SQLite, EXPLAIN ANALYZE
+# on Postgres (plain EXPLAIN for writes, which ANALYZE would run a second time).
+# Only plain SELECT/INSERT/UPDATE/DELETE are explained; a WITH can hide a write.
+
+SLOW_QUERY_MS = float(os.environ["SLOW_QUERY_MS"]) if os.environ.get("SLOW_QUERY_MS") else None
+SLOW_QUERY_MAX_SHAPES = 1000
+SLOW_QUERY_PARAMS_CHARS = 500
+EXPLAINABLE_STATEMENTS = ("SELECT", "INSERT", "UPDATE", "DELETE")
+
+_explained_shapes = set()
+_explained_lock = threading.Lock()
+_IN_LIST = re.compile(r"\((?:\?|%\([^)]*\)s)(?:, (?:\?|%\([^)]*\)s))+\)")
+
+
+def statement_shape(statement: str) -> str:
+    """Statement text with whitespace folded and IN-lists of any length made equal."""
+    return _IN_LIST.sub("(...)", " ".join(statement.split()))
+
+
+def explain_statement(cursor, statement: str, parameters):
+    """
+    The plan for `statement`, or None if it isn't one we explain. Runs on a
+    fresh cursor of the same DBAPI connection. On Postgres that happens inside
+    a savepoint that is always rolled back, so a failed EXPLAIN can't abort the
+    request's transaction and nothing ANALYZE did is kept. (SQLite's EXPLAIN
+    QUERY PLAN runs nothing, and SQLite won't open a savepoint while the
+    original statement is still being read.)
+    """
+    words = statement.split(None, 1)
+    keyword = words[0].upper() if words else ""
+    if keyword not in EXPLAINABLE_STATEMENTS:
+        return None
+    postgres = engine.dialect.name == "postgresql"
+    if postgres:
+        prefix = "EXPLAIN (ANALYZE, BUFFERS) " if keyword == "SELECT" else "EXPLAIN "
+    else:
+        prefix = "EXPLAIN QUERY PLAN "
+    plan_cursor = cursor.connection.cursor()
+    try:
+        if postgres:
+            plan_cursor.execute("SAVEPOINT slow_query_plan")
+        try:
+            plan_cursor.execute(prefix + statement, parameters)
+            return "\n".join(" ".join(str(col) for col in row) for row in plan_cursor.fetchall())
+        finally:
+            if postgres:
+                plan_cursor.execute("ROLLBACK TO SAVEPOINT slow_query_plan")
+                plan_cursor.execute("RELEASE SAVEPOINT slow_query_plan")
+    finally:
+        plan_cursor.close()
+
+
+def _log_slow_query(conn, cursor, statement, parameters, context, executemany):
+    elapsed_ms = (time.perf_counter() - context._query_started) * 1000
+    if elapsed_ms < SLOW_QUERY_MS:
+        return
+    endpoint = request.endpoint if has_request_context() else "-"
+    params = repr(parameters)
+    if len(params) > SLOW_QUERY_PARAMS_CHARS:
+        params = params[:SLOW_QUERY_PARAMS_CHARS] + "..."
+    app.logger.warning(
+        "slow query %.1f ms [%s]%s: %s params=%s",
+        elapsed_ms, endpoint, " (executemany)" if executemany else "", statement, params,
+    )
+
+    shape = statement_shape(statement)
+    with _explained_lock:
+        if shape in _explained_shapes or len(_explained_shapes) >= SLOW_QUERY_MAX_SHAPES:
+            return
+        _explained_shapes.add(shape)
+    try:
+        plan = explain_statement(cursor, statement, parameters[0] if executemany else parameters)
+    except Exception as e:
+        app.logger.warning("slow query plan unavailable: %s", e)
+        return
+    if plan is None:
+        return
+    app.logger.warning("slow query plan for [%s] %s:\n%s", endpoint, shape, plan)
+
+
+if SLOW_QUERY_MS is not None:
+    event.listen(Engine, "after_cursor_execute", _log_slow_query)
+
 
 # ---------- MENU DEFINITION WITH CATEGORIES ----------
 
@@ -232,65 +1360,523 @@ MENU_CATEGORIES = [
 ]
 
 
-def all_menu_items_with_category():
-    items = []
-    for cat in MENU_CATEGORIES:
-        for item in cat["items"]:
-            items.append({
-                "id": item["id"],
+class MenuCatalog:
+    """
+    Read-only index over MENU_CATEGORIES, built once at import:
+    a flat item list in menu order, an id -> item map and per-category metadata.
+    """
+
+    def __init__(self, categories):
+        self.categories = categories
+        self.items = []
+        self.categories_by_id = {}
+        for cat in categories:
+            self.categories_by_id[cat["id"]] = {
+                "id": cat["id"],
+                "name": cat["name"],
+                "item_ids": [item["id"] for item in cat["items"]],
+            }
+            for item in cat["items"]:
+                self.items.append({
+                    "id": item["id"],
+                    "name": item["name"],
+                    "category_id": cat["id"],
+                    "category_name": cat["name"],
+                })
+        self.by_id = {item["id"]: item for item in self.items}
+        self.positions = {item["id"]: pos for pos, item in enumerate(self.items)}
+
+    def get(self, item_id):
+        return self.by_id.get(item_id)
+
+    def parse_order_form(self, form) -> list:
+        """
+        Ordered lines from the submitted qty_<id> fields, in menu order.
+        Unknown ids, non-numeric and non-positive quantities are ignored.
+        """
+        lines = []
+        for key, qty_str in form.items():
+            if not key.startswith("qty_") or not qty_str:
+                continue
+            try:
+                item = self.by_id.get(int(key[4:]))
+                qty = int(qty_str)
+            except ValueError:
+                continue
+            if item is None or qty <= 0:
+                continue
+            lines.append({
+                "item_id": item["id"],
                 "name": item["name"],
-                "category_id": cat["id"],
-                "category_name": cat["name"],
+                "qty": qty,
+                "category_id": item["category_id"],
+                "category_name": item["category_name"],
             })
-    return items
+        lines.sort(key=lambda line: self.positions[line["item_id"]])
+        return lines
+
+
+MENU = MenuCatalog(MENU_CATEGORIES)
+
+
+def all_menu_items_with_category():
+    return list(MENU.items)
 
 
 def to_toronto_time(dt_obj: datetime) -> datetime:
-    """Convert any datetime to Toronto local time for display."""
+    """Convert a stored or in-memory datetime to Toronto local time for display."""
     if dt_obj is None:
         return None
-    if dt_obj.tzinfo is None:
-        # treat naive as UTC and convert to Toronto
-        dt_obj = dt_obj.replace(tzinfo=ZoneInfo("UTC"))
-    return dt_obj.astimezone(TORONTO_TZ)
+    return stored_local_time(dt_obj)
 
 
-# ---------- ROUTES ----------
+def format_created_at(dt_obj: datetime) -> str:
+    created_local = to_toronto_time(dt_obj)
+    return created_local.strftime("%Y-%m-%d %H:%M:%S") if created_local else ""
 
-@app.route("/")
-def index():
-    return redirect(url_for("order_page"))
 
+def kitchen_item(item_id: int, name: str, qty: int, category_id: int, category_name: str, status: str) -> dict:
+    return {
+        "id": item_id,  # menu item id
+        "name": name,
+        "qty": qty,
+        "category_id": category_id,
+        "category_name": category_name,
+        "status": status,
+    }
 
-@app.route("/order", methods=["GET"])
-def order_page():
-    return render_template("order.html", categories=MENU_CATEGORIES)
 
+def kitchen_order(order_id: int, customer_name: str, table: str, status: str, created_at: datetime, items: list) -> dict:
+    """Kitchen JSON shape of an order, shared by /api/orders, ?since and the live feed.
 
-@app.route("/order", methods=["POST"])
-def submit_order():
-    customer_name = request.form.get("customer_name", "").strip() or "Guest"
-    table = request.form.get("table", "").strip()
+    Everything that publishes an order builds it here, from ORM rows, RETURNING
+    rows or import dicts alike, so the three can't drift apart.
+    """
+    return {
+        "id": order_id,
+        "customer_name": customer_name,
+        "table": table,
+        "status": status,
+        "created_at": format_created_at(created_at),
+        "items": items,
+    }
 
-    ordered_items = []
 
-    for item in all_menu_items_with_category():
-        qty_str = request.form.get(f"qty_{item['id']}")
-        if not qty_str:
-            continue
-        try:
-            qty = int(qty_str)
-        except ValueError:
-            qty = 0
+def serialize_order_item(it: OrderItem) -> dict:
+    return kitchen_item(it.item_id, it.name, it.qty, it.category_id, it.category_name, it.status)
 
-        if qty > 0:
-            ordered_items.append({
-                "item_id": item["id"],
-                "name": item["name"],
-                "qty": qty,
-                "category_id": item["category_id"],
-                "category_name": item["category_name"],
-            })
+
+def serialize_order(o: Order) -> dict:
+    return kitchen_order(o.id, o.customer_name, o.table, o.status, o.created_at,
+                         [serialize_order_item(it) for it in o.items])
+
+
+# ---------- LIVE ORDER FEED ----------
+
+ACTIVE_STATUSES = ("new", "confirmed")
+KITCHEN_EVENTS = {"order-created", "order-confirmed", "order-updated", "item-rejected", "order-done", "order-removed"}
+
+# Seconds between keep-alive comments on an idle stream.
+ORDER_STREAM_HEARTBEAT = int(os.environ.get("ORDER_STREAM_HEARTBEAT", "15"))
+# Events buffered per subscriber before it is considered too slow and dropped.
+ORDER_STREAM_QUEUE_SIZE = 256
+
+
+# ---------- KITCHEN STATIONS ----------
+# Which menu categories each kitchen display cooks. Override with
+# KITCHEN_STATIONS='{"tandoor": ["roti"], ...}'.
+
+DEFAULT_KITCHEN_STATIONS = {
+    "tandoor": ["roti"],
+    "curry": ["sabzi", "paneer_special"],
+    "rice": ["basmati_ka_khajana"],
+    "cold": ["raita_salad"],
+    "snacks": ["snacks"],
+}
+
+
+def load_stations() -> dict:
+    stations = json.loads(os.environ.get("KITCHEN_STATIONS") or "null") or DEFAULT_KITCHEN_STATIONS
+    for name, category_ids in stations.items():
+        unknown = set(category_ids) - set(MENU.categories_by_id)
+        if unknown:
+            raise ValueError(f"station {name!r} has unknown categories: {sorted(unknown)}")
+    return {name: frozenset(category_ids) for name, category_ids in stations.items()}
+
+
+KITCHEN_STATIONS = load_stations()
+
+
+class UnknownStation(ValueError):
+    pass
+
+
+def station_arg():
+    """The ?station= request argument, validated. None means all stations."""
+    station = request.args.get("station") or None
+    if station is not None and station not in KITCHEN_STATIONS:
+        raise UnknownStation(station)
+    return station
+
+
+@app.errorhandler(UnknownStation)
+def _unknown_station(e):
+    return jsonify({
+        "success": False,
+        "error": f"unknown station {e.args[0]!r}",
+        "stations": sorted(KITCHEN_STATIONS),
+    }), 400
+
+
+def order_for_station(order: dict, station):
+    """The order with only this station's unfinished lines, or None if it has none."""
+    if station is None:
+        return order
+    categories = KITCHEN_STATIONS[station]
+    items = [it for it in order["items"] if it["category_id"] in categories and it.get("status") != "done"]
+    if not items:
+        return None
+    return {**order, "items": items}
+
+
+def orders_for_station(orders: list, station) -> list:
+    if station is None:
+        return orders
+    return [o for o in (order_for_station(o, station) for o in orders) if o is not None]
+
+
+def station_event(event_name: str, data, station):
+    """
+    Rewrite a kitchen event for one station's stream. Returns (event, data)
+    or None to drop it. An order left with none of the station's lines is
+    sent as 'order-removed'.
+    """
+    if station is None:
+        return event_name, data
+    if event_name in ("order-created", "order-confirmed", "order-updated"):
+        filtered = order_for_station(data, station)
+        if filtered is None:
+            return ("order-removed", {"id": data["id"]}) if event_name != "order-created" else None
+        return event_name, filtered
+    return event_name, data
+
+
+class _Subscriber:
+    def __init__(self):
+        self.queue = queue.Queue(maxsize=ORDER_STREAM_QUEUE_SIZE)
+        self.dropped = False
+
+
+class OrderEventHub:
+    """
+    Fan-out of kitchen order events to the streams open in this process.
+
+    A subscriber that falls too far behind is dropped instead of blocking
+    the publisher; its stream ends and the browser reconnects for a fresh
+    snapshot.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subscribers = set()
+
+    def subscribe(self) -> _Subscriber:
+        sub = _Subscriber()
+        with self._lock:
+            self._subscribers.add(sub)
+        return sub
+
+    def unsubscribe(self, sub: _Subscriber):
+        with self._lock:
+            self._subscribers.discard(sub)
+
+    def publish(self, version: int, event: str, data):
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for sub in subscribers:
+            try:
+                sub.queue.put_nowait((version, event, data))
+            except queue.Full:
+                sub.dropped = True
+                self.unsubscribe(sub)
+
+
+order_events = OrderEventHub()
+
+
+def sse_message(event: str, data) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+# ---------- CHANGE BUS ----------
+# Gets order events committed by any worker (or dyno) to every worker's
+# listeners, e.g. the local OrderEventHub. Writers call record_order_change()
+# inside their transaction; the bus takes over once the session commits.
+#
+#   CHANGE_BUS=inprocess  only this process's own writes (single worker / dev)
+#   CHANGE_BUS=changelog  poll the order_changes table (default for SQLite)
+#   CHANGE_BUS=notify     Postgres LISTEN/NOTIFY, reading order_changes on wake-up
+#                         (default for Postgres)
+
+CHANGE_BUS_POLL_INTERVAL = float(os.environ.get("CHANGE_BUS_POLL_INTERVAL", "0.5"))
+
+
+class ChangeBus(ABC):
+    """Base bus: delivers (version, event, data) to listeners in this process."""
+
+    def __init__(self):
+        self._listeners = []
+
+    def add_listener(self, fn):
+        self._listeners.append(fn)
+
+    def deliver(self, version: int, events):
+        for event_name, data in events:
+            for fn in self._listeners:
+                try:
+                    fn(version, event_name, data)
+                except Exception:
+                    app.logger.exception("change bus listener failed")
+
+    def start(self):
+        """Begin receiving other workers' changes. Safe to call repeatedly."""
+
+    def before_commit(self, session, version: int):
+        """Hook inside the writing transaction."""
+
+    @abstractmethod
+    def after_commit(self, changes):
+        """Hook after the writing transaction committed: [(version, events), ...]."""
+
+
+class InProcessBus(ChangeBus):
+    def after_commit(self, changes):
+        for version, events in changes:
+            self.deliver(version, events)
+
+
+class ChangeLogBus(ChangeBus):
+    """
+    Tails order_changes from a background thread. Local commits wake it up
+    immediately; other workers' commits are seen within one poll interval.
+    """
+
+    def __init__(self, poll_interval: float = CHANGE_BUS_POLL_INTERVAL):
+        super().__init__()
+        self.poll_interval = poll_interval
+        self._wake = threading.Event()
+        self._thread = None
+        self._pid = None
+        self._start_lock = threading.Lock()
+        self.last_version = None
+
+    def start(self):
+        with self._start_lock:
+            # threads don't survive fork; restart in each worker
+            if self._thread is not None and self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            # once per worker, on its first kitchen request: not that request's query budget
+            with queries_not_counted():
+                session = SessionLocal()
+                try:
+                    self.last_version = current_change_version(session)
+                finally:
+                    session.close()
+            self._thread = threading.Thread(target=self._run, name="change-bus", daemon=True)
+            self._thread.start()
+
+    def after_commit(self, changes):
+        self._wake.set()
+
+    def _wait(self):
+        self._wake.wait(self.poll_interval)
+        self._wake.clear()
+
+    def _run(self):
+        while True:
+            self._wait()
+            try:
+                self.poll()
+            except Exception:
+                app.logger.exception("change bus poll failed")
+                time.sleep(self.poll_interval)
+
+    def poll(self):
+        session = SessionLocal()
+        try:
+            rows = session.execute(
+                select(OrderChange.version, OrderChange.events)
+                .where(OrderChange.version > self.last_version)
+                .order_by(OrderChange.version)
+            ).all()
+        finally:
+            session.close()
+        for version, events in rows:
+            self.last_version = version
+            self.deliver(version, json.loads(events or "[]"))
+
+
+class PostgresNotifyBus(ChangeLogBus):
+    """
+    ChangeLogBus woken by LISTEN/NOTIFY instead of a tight poll. The NOTIFY is
+    sent inside the writing transaction, so Postgres delivers it on commit;
+    it carries only the version and the rows are read from order_changes.
+    """
+
+    CHANNEL = "order_changes"
+
+    def __init__(self, poll_interval: float = 5.0):
+        super().__init__(poll_interval)
+        self._listen_conn = None
+
+    def before_commit(self, session, version: int):
+        session.execute(text("SELECT pg_notify(:channel, :payload)"),
+                        {"channel": self.CHANNEL, "payload": str(version)})
+
+    def _listen(self):
+        conn = engine.raw_connection()  # a dedicated connection, detached from the pool
+        conn.detach()
+        conn.driver_connection.autocommit = True
+        cursor = conn.cursor()
+        cursor.execute(f"LISTEN {self.CHANNEL}")
+        cursor.close()
+        self._listen_conn = conn.driver_connection
+
+    def _wait(self):
+        if self._wake.is_set():
+            self._wake.clear()
+            return
+        try:
+            if self._listen_conn is None:
+                self._listen()
+            select_module.select([self._listen_conn], [], [], self.poll_interval)
+            self._listen_conn.poll()
+            self._listen_conn.notifies.clear()
+        except Exception:
+            # fall back to plain polling until LISTEN can be re-established
+            app.logger.exception("LISTEN connection lost")
+            self._listen_conn = None
+            time.sleep(self.poll_interval)
+
+
+def make_change_bus() -> ChangeBus:
+    kind = os.environ.get("CHANGE_BUS") or ("notify" if DATABASE_BACKEND == "postgresql" else "changelog")
+    if kind == "inprocess":
+        return InProcessBus()
+    if kind == "changelog":
+        return ChangeLogBus()
+    if kind == "notify":
+        return PostgresNotifyBus()
+    raise ValueError(f"unknown CHANGE_BUS {kind!r}")
+
+
+change_bus = make_change_bus()
+change_bus.add_listener(order_events.publish)
+
+
+# ---------- ACTIVE ORDERS CACHE ----------
+
+# Longest this worker serves /api/orders from memory without checking the version
+# counter, in case a change bus message was missed. Normally the bus drops the
+# cache well before that (within CHANGE_BUS_POLL_INTERVAL on SQLite).
+ACTIVE_ORDERS_CACHE_TTL = float(os.environ.get("ACTIVE_ORDERS_CACHE_TTL", "5"))
+
+
+class _ActiveOrdersEntry:
+    def __init__(self, version: int, orders: list):
+        self.version = version
+        self.orders = orders
+        self.bodies = {}  # station (None = all) -> JSON body
+        self.checked_at = time.monotonic()
+
+    def body(self, station=None) -> str:
+        body = self.bodies.get(station)
+        if body is None:
+            orders = self.orders if station is None else orders_for_station(self.orders, station)
+            body = self.bodies[station] = app.json.dumps(orders)
+        return body
+
+
+class ActiveOrdersCache:
+    """This worker's pre-serialized /api/orders bodies (full and per station) and the version they reflect."""
+
+    def __init__(self, ttl: float = ACTIVE_ORDERS_CACHE_TTL):
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._entry = None
+        self._latest_seen = 0
+
+    def on_change(self, version: int, event_name: str, data):
+        if event_name not in KITCHEN_EVENTS:
+            return  # e.g. a review: the active orders are as they were
+        with self._lock:
+            self._latest_seen = max(self._latest_seen, version)
+            if self._entry is not None and version > self._entry.version:
+                self._entry = None
+
+    def get(self, station=None):
+        """Return (version, json_body), touching the database only when stale."""
+        with self._lock:
+            entry = self._entry
+            if entry is not None and time.monotonic() - entry.checked_at < self.ttl:
+                return entry.version, entry.body(station)
+
+        session = SessionLocal()
+        try:
+            version = current_kitchen_version(session)
+            if entry is None or entry.version != version:
+                entry = _ActiveOrdersEntry(version, [serialize_order(o) for o in active_orders(session)])
+        finally:
+            session.close()
+
+        with self._lock:
+            entry.checked_at = time.monotonic()
+            # don't cache a build the bus has already reported as outdated
+            if version >= self._latest_seen:
+                self._entry = entry
+            return version, entry.body(station)
+
+
+active_orders_cache = ActiveOrdersCache()
+change_bus.add_listener(active_orders_cache.on_change)
+
+
+@event.listens_for(SessionLocal, "after_commit")
+def _publish_committed_changes(session):
+    changes = session.info.pop("pending_changes", None)
+    if changes:
+        # our own writes must show up in this worker's next response, not after the bus catches up
+        for version, events in changes:
+            for name, _ in events:
+                active_orders_cache.on_change(version, name, None)
+                ORDER_EVENTS.labels(event=name).inc()
+        change_bus.after_commit(changes)
+
+
+@event.listens_for(SessionLocal, "after_soft_rollback")
+def _drop_rolled_back_changes(session, previous_transaction):
+    session.info.pop("pending_changes", None)
+
+
+# ---------- ROUTES ----------
+
+@app.route("/")
+def index():
+    return redirect(url_for("order_page"))
+
+
+@app.route("/order", methods=["GET"])
+def order_page():
+    return render_template("order.html", categories=MENU_CATEGORIES)
+
+
+@app.route("/order", methods=["POST"])
+def submit_order():
+    customer_name = request.form.get("customer_name", "").strip() or "Guest"
+    table = request.form.get("table", "").strip()
+
+    ordered_items = MENU.parse_order_form(request.form)
 
     if not ordered_items:
         return redirect(url_for("order_page"))
@@ -298,44 +1884,20 @@ def submit_order():
     session = SessionLocal()
     try:
         created_at = datetime.now(TORONTO_TZ)  # Toronto time
-
-        order_db = Order(
-            customer_name=customer_name,
-            table=table,
-            status="new",
-            created_at=created_at,
-        )
-        session.add(order_db)
-        session.flush()  # assigns order_db.id
-
-        for it in ordered_items:
-            oi = OrderItem(
-                order_id=order_db.id,
-                item_id=it["item_id"],
-                name=it["name"],
-                qty=it["qty"],
-                category_id=it["category_id"],
-                category_name=it["category_name"],
-            )
-            session.add(oi)
-
+        order_id = create_order(session, customer_name, table, created_at, ordered_items)
         session.commit()
-
-        created_local = to_toronto_time(order_db.created_at)
-        created_str = created_local.strftime("%Y-%m-%d %H:%M:%S") if created_local else ""
-
-        success_order = {
-            "id": order_db.id,
-            "customer_name": order_db.customer_name,
-            "table": order_db.table,
-            "status": order_db.status,
-            "created_at": created_str,
-            "items": ordered_items,
-        }
-
     finally:
         session.close()
 
+    success_order = {
+        "id": order_id,
+        "customer_name": customer_name,
+        "table": table,
+        "status": "new",
+        "created_at": format_created_at(created_at),
+        "items": ordered_items,
+    }
+
     return render_template(
         "order.html",
         categories=MENU_CATEGORIES,
@@ -343,9 +1905,55 @@ def submit_order():
     )
 
 
+def create_order(session, customer_name: str, table: str, created_at: datetime, ordered_items: list) -> int:
+    """
+    Insert an order and all its lines without going through the ORM unit of work:
+    one INSERT ... RETURNING for the order and one executemany for the items.
+    Returns the new order id; the caller commits.
+    """
+    order_id = session.execute(
+        insert(Order)
+        .values(
+            customer_name=customer_name,
+            table=table,
+            status="new",
+            created_at=created_at,
+        )
+        .returning(Order.id)
+    ).scalar_one()
+
+    session.execute(
+        OrderItem.__table__.insert(),
+        [
+            {
+                "order_id": order_id,
+                "item_id": it["item_id"],
+                "name": it["name"],
+                "qty": it["qty"],
+                "category_id": it["category_id"],
+                "category_name": it["category_name"],
+            }
+            for it in ordered_items
+        ],
+    )
+
+    created = kitchen_order(order_id, customer_name, table, "new", created_at, [
+        kitchen_item(it["item_id"], it["name"], it["qty"], it["category_id"], it["category_name"], "new")
+        for it in ordered_items
+    ])
+    record_order_change(session, order_id, "new", [("order-created", created)])
+    return order_id
+
+
+@app.route("/api/pool")
+def api_pool():
+    """Connection pool usage of the worker that serves the request."""
+    return jsonify(pool_status())
+
+
 @app.route("/kitchen")
 def kitchen_page():
-    return render_template("kitchen.html")
+    return render_template("kitchen.html", stations=sorted(KITCHEN_STATIONS), station=station_arg())
 
 
 @app.route("/api/orders")
@@ -354,41 +1962,445 @@ def api_orders():
     Return only active orders for the kitchen:
     - 'new' (just placed)
     - 'confirmed' (kitchen accepted, waiting to be cooked / finished)
+
+    The full list is served from this worker's ActiveOrdersCache. Every
+    response carries the kitchen version (last change to the active orders,
+    so reviews don't count) as its ETag and in X-Orders-Version; a matching
+    If-None-Match gets a 304.
+
+    With ?since=<version> the response is
+    {"version", "orders": [changed active orders], "removed": [ids], "reset"}
+    where "reset" means the cursor was too old and "orders" is the full list.
+
+    With ?station=<name> only orders with lines for that station's
+    categories are returned, carrying only those lines.
     """
-    session = SessionLocal()
-    try:
-        orders_db = (
+    since = request.args.get("since", type=int)
+    station = station_arg()
+
+    if since is None:
+        change_bus.start()
+        version, body = active_orders_cache.get(station)
+        etag = f"orders-{station or 'all'}-{version}"
+        if request.if_none_match.contains(etag):
+            resp = Response(status=304)
+        else:
+            resp = Response(body, mimetype="application/json")
+    else:
+        session = SessionLocal()
+        try:
+            # read the version first: anything committed afterwards is at worst
+            # sent again on the next poll
+            version = current_change_version(session)
+            resp = jsonify(order_changes_since(session, since, version, station))
+        finally:
+            session.close()
+        etag = f"orders-{station or 'all'}-{version}"
+
+    resp.set_etag(etag)
+    resp.headers["X-Orders-Version"] = str(version)
+    resp.headers["Cache-Control"] = "no-cache"
+    return resp
+
+
+def order_changes_since(session, since: int, version: int, station=None) -> dict:
+    oldest = session.execute(select(func.min(OrderChange.version))).scalar()
+    if since > version or (since < version and (oldest is None or since < oldest - 1)):
+        return {
+            "version": version,
+            "orders": orders_for_station([serialize_order(o) for o in active_orders(session)], station),
+            "removed": [],
+            "reset": True,
+        }
+
+    changed_ids = session.execute(
+        select(OrderChange.order_id).where(OrderChange.version > since).distinct()
+    ).scalars().all()
+
+    orders = []
+    removed = set(changed_ids)
+    if changed_ids:
+        for o in (
             session.query(Order)
-            .filter(Order.status.in_(["new", "confirmed"]))
+            .options(selectinload(Order.items))
+            .filter(Order.id.in_(changed_ids), Order.status.in_(ACTIVE_STATUSES))
             .order_by(Order.id)
-            .all()
+        ):
+            order = order_for_station(serialize_order(o), station)
+            if order is not None:
+                orders.append(order)
+                removed.discard(o.id)
+
+    return {
+        "version": version,
+        "orders": orders,
+        "removed": sorted(removed),
+        "reset": False,
+    }
+
+
+def active_orders(session):
+    return (
+        session.query(Order)
+        .options(selectinload(Order.items))
+        .filter(Order.status.in_(ACTIVE_STATUSES))
+        .order_by(Order.id)
+        .all()
+    )
+
+
+def prep_summary(session, statuses=ACTIVE_STATUSES, station=None) -> list:
+    """
+    Unfinished lines of active orders grouped by menu item: total quantity,
+    number of orders and the oldest order time, summed in SQL. `statuses` are
+    line statuses. Sorted in menu order.
+    """
+    rows = session.execute(
+        select(
+            OrderItem.item_id,
+            OrderItem.name,
+            OrderItem.category_id,
+            OrderItem.category_name,
+            func.sum(OrderItem.qty).label("qty"),
+            func.count(func.distinct(OrderItem.order_id)).label("orders"),
+            func.min(Order.created_at).label("oldest"),
         )
+        .join(Order, Order.id == OrderItem.order_id)
+        .where(Order.status.in_(ACTIVE_STATUSES), OrderItem.status.in_(statuses))
+        .where(*([OrderItem.category_id.in_(KITCHEN_STATIONS[station])] if station else []))
+        .group_by(OrderItem.item_id, OrderItem.name, OrderItem.category_id, OrderItem.category_name)
+    ).all()
+
+    positions = MENU.positions
+    return [
+        {
+            "item_id": r.item_id,
+            "name": r.name,
+            "category_id": r.category_id,
+            "category_name": r.category_name,
+            "qty": r.qty,
+            "orders": r.orders,
+            "oldest_created_at": format_created_at(r.oldest),
+        }
+        for r in sorted(rows, key=lambda r: positions.get(r.item_id, len(positions)))
+    ]
 
-        result = []
-        for o in orders_db:
-            created_local = to_toronto_time(o.created_at)
-            created_str = created_local.strftime("%Y-%m-%d %H:%M:%S") if created_local else ""
-            result.append({
-                "id": o.id,
-                "customer_name": o.customer_name,
-                "table": o.table,
-                "status": o.status,
-                "created_at": created_str,
-                "items": [
-                    {
-                        "id": it.item_id,  # menu item id
-                        "name": it.name,
-                        "qty": it.qty,
-                        "category_id": it.category_id,
-                        "category_name": it.category_name,
-                    }
-                    for it in o.items
-                ],
-            })
+
+@app.route("/api/prep")
+def api_prep():
+    """
+    Batch-cook view of the active orders: identical items summed across tickets.
+    ?status=new|confirmed limits it to lines in that status, ?station= to one station.
+    ETag/304 like /api/orders.
+    """
+    station = station_arg()
+    status = request.args.get("status")
+    statuses = (status,) if status in ACTIVE_STATUSES else ACTIVE_STATUSES
+
+    session = SessionLocal()
+    try:
+        version = current_kitchen_version(session)
+        etag = f"prep-{station or 'all'}-{'-'.join(statuses)}-{version}"
+        if request.if_none_match.contains(etag):
+            resp = Response(status=304)
+        else:
+            resp = jsonify({"version": version, "items": prep_summary(session, statuses, station)})
+    finally:
+        session.close()
+
+    resp.set_etag(etag)
+    resp.headers["Cache-Control"] = "no-cache"
+    return resp
+
+
+@app.route("/kitchen/prep")
+def prep_page():
+    return render_template("prep.html", stations=sorted(KITCHEN_STATIONS), station=station_arg())
+
+
+@app.route("/api/orders/stream")
+def api_orders_stream():
+    """
+    Server-Sent Events feed for the kitchen screen.
+
+    Sends one 'snapshot' event with the active orders, then pushes
+    'order-created', 'order-confirmed', 'order-updated' (a station's lines
+    moved on), 'item-rejected' and 'order-done' as they are committed. With ?station=<name> only that station's lines
+    are sent, and an order left with none of them arrives as 'order-removed'.
+    """
+    station = station_arg()
+    change_bus.start()
+    # Subscribe before reading the snapshot so nothing committed in between is lost;
+    # events the snapshot already reflects are skipped by version, anything newer
+    # is applied idempotently by the client.
+    sub = order_events.subscribe()
+    session = SessionLocal()
+    try:
+        snapshot_version = current_change_version(session)
+        snapshot = orders_for_station([serialize_order(o) for o in active_orders(session)], station)
+    except Exception:
+        order_events.unsubscribe(sub)
+        raise
     finally:
         session.close()
 
-    return jsonify(result)
+    def generate():
+        try:
+            yield "retry: 3000\n\n"
+            yield sse_message("snapshot", snapshot)
+            while not sub.dropped:
+                try:
+                    version, event_name, data = sub.queue.get(timeout=ORDER_STREAM_HEARTBEAT)
+                except queue.Empty:
+                    yield ": keep-alive\n\n"
+                    continue
+                if version <= snapshot_version or event_name not in KITCHEN_EVENTS:
+                    continue
+                message = station_event(event_name, data, station)
+                if message is not None:
+                    yield sse_message(*message)
+        finally:
+            order_events.unsubscribe(sub)
+
+    return Response(
+        generate(),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+def lock_order(session, order_id: int):
+    """Read an order and lock its row (Postgres) so station actions on it run one at a time."""
+    return session.execute(
+        select(Order.id, Order.customer_name, Order.table, Order.status, Order.created_at)
+        .where(Order.id == order_id)
+        .with_for_update()
+    ).first()
+
+
+def station_lines(session, order_id: int, station, statuses) -> list:
+    """(line id, menu item id) of the order's lines in `statuses` that the station cooks."""
+    return session.execute(
+        select(OrderItem.id, OrderItem.item_id).where(
+            OrderItem.order_id == order_id,
+            OrderItem.status.in_(statuses),
+            OrderItem.category_id.in_(KITCHEN_STATIONS[station]),
+        )
+    ).all()
+
+
+def settle_order(session, order, events: list):
+    """
+    After a station changed some lines: derive the order status from all of
+    them, write it and record the change. Returns (http_status, result).
+
+    No lines left -> rejected, all done -> done, none waiting -> confirmed,
+    otherwise the order stays new until every station has acted.
+    """
+    items = session.execute(
+        select(OrderItem).where(OrderItem.order_id == order.id).order_by(OrderItem.id)
+    ).scalars().all()
+    line_statuses = {it.status for it in items}
+    if not items:
+        status = "rejected"
+    elif line_statuses == {"done"}:
+        status = "done"
+    elif "new" in line_statuses:
+        status = "new"
+    else:
+        status = "confirmed"
+
+    if status != order.status:
+        session.execute(
+            update(Order)
+            .where(Order.id == order.id)
+            .values(status=status)
+            .execution_options(synchronize_session=False)
+        )
+
+    if status == "done":
+        rollup_sales(session, sales_rows(
+            (order.created_at, it.item_id, it.name, it.category_id, it.category_name, it.qty, order.id)
+            for it in items
+        ))
+        events.append(("order-done", {"id": order.id}))
+    else:
+        data = kitchen_order(order.id, order.customer_name, order.table, status, order.created_at,
+                             [serialize_order_item(it) for it in items])
+        settled = order.status == "new" and status != "new"
+        events.append(("order-confirmed" if settled else "order-updated", data))
+    record_order_change(session, order.id, status, events)
+    return 200, {"success": True, "status": status}
+
+
+# Whole-order actions (no station) are guarded set-based statements: one UPDATE
+# of the order (its expected status is the guard) and one for its lines, plus
+# the rejected lines' DELETE and the change record. A station's action can't be
+# decided that way -- whether the order moves on depends on the other stations'
+# lines -- so it locks the order, reads its lines and settles the status in
+# Python (about twice the statements).
+
+def apply_confirm(session, order_id: int, rejected_item_ids, reject_all: bool = False, station=None):
+    """
+    Confirm an order inside the caller's transaction, or only the station's
+    lines of it. Returns (http_status, result).
+
+    Rejected lines are removed, the rest confirmed; the order is confirmed
+    once no station has lines waiting. 409 if the order is no longer new or
+    the station has nothing left to confirm (e.g. another screen did it).
+    """
+    if station is not None:
+        return confirm_station_lines(session, order_id, rejected_item_ids, reject_all, station)
+
+    if reject_all:
+        new_status = literal("rejected")
+    else:
+        survives = (
+            select(OrderItem.id)
+            .where(OrderItem.order_id == Order.id, OrderItem.item_id.not_in(rejected_item_ids))
+            .exists()
+        )
+        new_status = case((survives, "confirmed"), else_="rejected")
+
+    row = session.execute(
+        update(Order)
+        .where(Order.id == order_id, Order.status == "new")
+        .values(status=new_status)
+        .returning(Order.id, Order.customer_name, Order.table, Order.status, Order.created_at)
+        .execution_options(synchronize_session=False)
+    ).first()
+    if row is None:
+        return transition_conflict(order_status(session, order_id))
+
+    events = []
+    if reject_all or rejected_item_ids:
+        rejected = delete(OrderItem).where(OrderItem.order_id == order_id)
+        if not reject_all:
+            rejected = rejected.where(OrderItem.item_id.in_(rejected_item_ids))
+        removed = session.execute(
+            rejected.returning(OrderItem.item_id).execution_options(synchronize_session=False)
+        ).scalars().all()
+        if removed:
+            events.append(("item-rejected", {"order_id": order_id, "item_ids": sorted(set(removed))}))
+
+    # confirm the waiting lines; lines a station already confirmed or finished keep their status
+    items = session.execute(
+        update(OrderItem)
+        .where(OrderItem.order_id == order_id)
+        .values(status=case((OrderItem.status == "new", "confirmed"), else_=OrderItem.status))
+        .returning(
+            OrderItem.id, OrderItem.item_id, OrderItem.name, OrderItem.qty,
+            OrderItem.category_id, OrderItem.category_name, OrderItem.status,
+        )
+        .execution_options(synchronize_session=False)
+    ).all()
+    items.sort(key=lambda it: it.id)
+    confirmed = kitchen_order(row.id, row.customer_name, row.table, row.status, row.created_at,
+                              [serialize_order_item(it) for it in items])
+    events.append(("order-confirmed", confirmed))
+    record_order_change(session, order_id, row.status, events)
+    return 200, {"success": True, "status": row.status}
+
+
+def apply_done(session, order_id: int, station=None):
+    """
+    Mark an active order done inside the caller's transaction, or only the
+    station's lines of it. Returns (http_status, result). The order is done,
+    and counted in the sales rollup, once all its lines are.
+    """
+    if station is not None:
+        return finish_station_lines(session, order_id, station)
+
+    row = session.execute(
+        update(Order)
+        .where(Order.id == order_id, Order.status.in_(ACTIVE_STATUSES))
+        .values(status="done")
+        .returning(Order.created_at)
+        .execution_options(synchronize_session=False)
+    ).first()
+    if row is None:
+        return transition_conflict(order_status(session, order_id))
+
+    lines = session.execute(
+        update(OrderItem)
+        .where(OrderItem.order_id == order_id)
+        .values(status="done")
+        .returning(OrderItem.item_id, OrderItem.name, OrderItem.category_id, OrderItem.category_name, OrderItem.qty)
+        .execution_options(synchronize_session=False)
+    ).all()
+    rollup_sales(session, sales_rows((row.created_at, *line, order_id) for line in lines))
+
+    record_order_change(session, order_id, "done", [("order-done", {"id": order_id})])
+    return 200, {"success": True, "status": "done"}
+
+
+def confirm_station_lines(session, order_id: int, rejected_item_ids, reject_all: bool, station):
+    """apply_confirm for one station: its waiting lines only."""
+    order = lock_order(session, order_id)
+    if order is None or order.status != "new":
+        return transition_conflict(order.status if order else None)
+
+    lines = station_lines(session, order_id, station, ("new",))
+    if not lines:
+        return 409, {"success": False, "error": "Nothing left to confirm for this station", "status": order.status}
+
+    rejected = [line for line in lines if reject_all or line.item_id in rejected_item_ids]
+    accepted = [line.id for line in lines if not (reject_all or line.item_id in rejected_item_ids)]
+    events = []
+    if rejected:
+        session.execute(
+            delete(OrderItem)
+            .where(OrderItem.id.in_([line.id for line in rejected]))
+            .execution_options(synchronize_session=False)
+        )
+        events.append(("item-rejected", {"order_id": order_id, "item_ids": sorted({line.item_id for line in rejected})}))
+    if accepted:
+        session.execute(
+            update(OrderItem)
+            .where(OrderItem.id.in_(accepted))
+            .values(status="confirmed")
+            .execution_options(synchronize_session=False)
+        )
+    return settle_order(session, order, events)
+
+
+def finish_station_lines(session, order_id: int, station):
+    """apply_done for one station: its open lines only."""
+    order = lock_order(session, order_id)
+    if order is None or order.status not in ACTIVE_STATUSES:
+        return transition_conflict(order.status if order else None)
+
+    lines = station_lines(session, order_id, station, ACTIVE_STATUSES)
+    if not lines:
+        return 409, {"success": False, "error": "Nothing left to finish for this station", "status": order.status}
+
+    session.execute(
+        update(OrderItem)
+        .where(OrderItem.id.in_([line.id for line in lines]))
+        .values(status="done")
+        .execution_options(synchronize_session=False)
+    )
+    return settle_order(session, order, [])
+
+
+def station_item_ids(item_ids, station) -> list:
+    """Menu item ids limited to the station's categories (all of them for no station)."""
+    if station is not None:
+        categories = KITCHEN_STATIONS[station]
+        item_ids = {i for i in item_ids if i in MENU.by_id and MENU.by_id[i]["category_id"] in categories}
+    return sorted(item_ids)
+
+
+def order_status(session, order_id: int):
+    """Current status of an order, None if it doesn't exist (after a guarded UPDATE matched no row)."""
+    return session.execute(select(Order.status).where(Order.id == order_id)).scalar()
+
+
+def transition_conflict(status):
+    """Result for an action on an order that is missing (None) or no longer in the status it needs."""
+    if status is None:
+        return 404, {"success": False, "error": "Order not found"}
+    return 409, {"success": False, "error": f"Order is already {status}", "status": status}
 
 
 @app.route("/api/orders/<int:order_id>/confirm", methods=["POST"])
@@ -397,109 +2409,206 @@ def confirm_order(order_id):
     Kitchen confirms an order.
     Request JSON: { "rejected_item_ids": [menu_item_id, ...] }
 
-    - Removes rejected items from the order.
+    - Removes rejected items from the order, confirms the rest.
     - If all items are rejected -> status = 'rejected'.
     - Otherwise -> status = 'confirmed'.
+    - 409 if the order is no longer 'new' (e.g. another screen confirmed it).
+    - With ?station=<name>, only that station's lines are rejected or
+      confirmed; the order stays 'new' until every station involved has
+      confirmed its own, and 409 means this station already did.
     """
+    station = station_arg()
     data = request.get_json(force=True) or {}
     rejected_item_ids = data.get("rejected_item_ids", []) or []
 
     # cast to int to be safe
-    rejected_item_ids = [int(x) for x in rejected_item_ids]
+    rejected_item_ids = station_item_ids({int(x) for x in rejected_item_ids}, station)
 
-    session = SessionLocal()
+    session = write_session()
     try:
-        order = session.query(Order).filter_by(id=order_id).first()
-        if not order:
-            session.close()
-            return jsonify({"success": False, "error": "Order not found"}), 404
+        code, result = apply_confirm(session, order_id, rejected_item_ids, station=station)
+        session.commit()
+    finally:
+        session.close()
 
-        # remove rejected items
-        for oi in list(order.items):
-            if oi.item_id in rejected_item_ids:
-                session.delete(oi)
+    return jsonify(result), code
 
-        session.flush()
-
-        if not order.items:
-            order.status = "rejected"
-        else:
-            order.status = "confirmed"
 
+@app.route("/api/orders/<int:order_id>/done", methods=["POST"])
+def mark_order_done(order_id):
+    """
+    Kitchen finishes an order. With ?station=<name> only that station's lines
+    are marked done; the order is done once every station has finished.
+    """
+    station = station_arg()
+    session = write_session()
+    try:
+        code, result = apply_done(session, order_id, station)
         session.commit()
-
-        return jsonify({"success": True, "status": order.status})
     finally:
         session.close()
 
+    return jsonify(result), code
 
-@app.route("/api/orders/<int:order_id>/done", methods=["POST"])
-def mark_order_done(order_id):
-    session = SessionLocal()
+
+BATCH_MAX_ACTIONS = 100
+
+
+@app.route("/api/orders/batch", methods=["POST"])
+def batch_order_actions():
+    """
+    Apply many kitchen actions in one transaction.
+    Request JSON: { "actions": [
+        {"order_id": 1, "action": "confirm", "rejected_item_ids": [...]},
+        {"order_id": 2, "action": "reject"},
+        {"order_id": 3, "action": "done"},
+    ] }
+
+    Each action is guarded like its single-order endpoint; one that no longer
+    applies (404/409) is reported in its result and does not undo the others.
+    ?station= limits every action to that station's lines, as for confirm and done.
+    Response: { "results": [{"order_id", "action", "code", "success", ...}, ...] }
+    """
+    station = station_arg()
+    data = request.get_json(force=True) or {}
+    actions = data.get("actions") or []
+    if not isinstance(actions, list) or len(actions) > BATCH_MAX_ACTIONS:
+        return jsonify({"success": False, "error": f"'actions' must be a list of at most {BATCH_MAX_ACTIONS}"}), 400
+
+    parsed = []
     try:
-        order = session.query(Order).filter_by(id=order_id).first()
-        if order:
-            order.status = "done"
-            session.commit()
+        for a in actions:
+            action = a.get("action")
+            if action not in ("confirm", "reject", "done"):
+                raise ValueError(f"unknown action {action!r}")
+            parsed.append((
+                int(a["order_id"]),
+                action,
+                station_item_ids({int(x) for x in a.get("rejected_item_ids") or []}, station),
+            ))
+    except (AttributeError, KeyError, TypeError, ValueError) as e:
+        return jsonify({"success": False, "error": f"invalid action: {e}"}), 400
+
+    results = []
+    session = write_session()
+    try:
+        for order_id, action, rejected_item_ids in parsed:
+            if action == "done":
+                code, result = apply_done(session, order_id, station)
+            else:
+                # with a station, "reject" turns down only its own lines, not the whole order
+                code, result = apply_confirm(
+                    session, order_id, rejected_item_ids, reject_all=(action == "reject"), station=station,
+                )
+            results.append({"order_id": order_id, "action": action, "code": code, **result})
+        session.commit()
     finally:
         session.close()
 
-    return jsonify({"success": True})
+    return jsonify({"success": True, "results": results})
 
 
 # ---------- REVIEWS / COMPLETED ORDERS ----------
 
-@app.route("/reviews", methods=["GET"])
-def reviews_page():
-    """Show completed orders and allow rating + comments."""
-    session = SessionLocal()
-    pending = []
-    reviewed = []
-    try:
-        orders_db = (
-            session.query(Order)
-            .filter(Order.status == "done")
-            .order_by(Order.id.desc())
-            .all()
-        )
+REVIEWS_PAGE_SIZE = 20
+REVIEWS_PAGE_MAX = 100
 
-        for o in orders_db:
-            created_local = to_toronto_time(o.created_at)
-            created_str = created_local.strftime("%Y-%m-%d %H:%M:%S") if created_local else ""
 
-            items = [
-                {
-                    "name": it.name,
-                    "qty": it.qty,
-                    "category_name": it.category_name,
-                }
-                for it in o.items
-            ]
-
-            base = {
-                "id": o.id,
-                "customer_name": o.customer_name or "Guest",
-                "table": o.table or "No table",
-                "created_at": created_str,
-                "items": items,
+def serialize_completed_order(o: Order) -> dict:
+    base = {
+        "id": o.id,
+        "customer_name": o.customer_name or "Guest",
+        "table": o.table or "No table",
+        "created_at": format_created_at(o.created_at),
+        "items": [
+            {
+                "name": it.name,
+                "qty": it.qty,
+                "category_name": it.category_name,
             }
+            for it in o.items
+        ],
+    }
+    if o.review is not None:
+        base["rating"] = o.review.rating
+        base["comment"] = o.review.comment or ""
+    return base
 
-            if o.review is None:
-                pending.append(base)
-            else:
-                base["rating"] = o.review.rating
-                base["comment"] = o.review.comment or ""
-                reviewed.append(base)
+
+def completed_orders_page(session, reviewed: bool, before, limit: int):
+    """
+    One page of 'done' orders, newest first, keyed on order id, across the
+    live and archive tables. Returns (orders, next_before); next_before is
+    None on the last page.
+    """
+    rows = []
+    for order_model, review_model in ((Order, Review), (ArchivedOrder, ArchivedReview)):
+        query = (
+            session.query(order_model)
+            .options(selectinload(order_model.items), contains_eager(order_model.review))
+        )
+        if reviewed:
+            query = query.join(review_model, review_model.order_id == order_model.id)
+        else:
+            query = (
+                query.outerjoin(review_model, review_model.order_id == order_model.id)
+                .filter(review_model.order_id.is_(None))
+            )
+
+        query = query.filter(order_model.status == "done")
+        if before is not None:
+            query = query.filter(order_model.id < before)
+
+        rows.extend(query.order_by(order_model.id.desc()).limit(limit + 1).all())
+
+    rows.sort(key=lambda o: o.id, reverse=True)
+    next_before = rows[limit - 1].id if len(rows) > limit else None
+    return [serialize_completed_order(o) for o in rows[:limit]], next_before
+
+
+def reviews_page_data():
+    """Both sections of the reviews page, paginated by ?pending_before= / ?reviewed_before=."""
+    limit = request.args.get("limit", REVIEWS_PAGE_SIZE, type=int)
+    limit = max(1, min(limit, REVIEWS_PAGE_MAX))
+    pending_before = request.args.get("pending_before", type=int)
+    reviewed_before = request.args.get("reviewed_before", type=int)
+
+    session = SessionLocal()
+    try:
+        pending, next_pending = completed_orders_page(session, False, pending_before, limit)
+        reviewed, next_reviewed = completed_orders_page(session, True, reviewed_before, limit)
     finally:
         session.close()
 
+    return {
+        "limit": limit,
+        "pending": pending,
+        "pending_before": pending_before,
+        "next_pending_before": next_pending,
+        "reviewed": reviewed,
+        "reviewed_before": reviewed_before,
+        "next_reviewed_before": next_reviewed,
+    }
+
+
+@app.route("/reviews", methods=["GET"])
+def reviews_page():
+    """Show completed orders and allow rating + comments."""
+    data = reviews_page_data()
     return render_template(
         "reviews.html",
-        pending_orders=pending,
-        reviewed_orders=reviewed,
+        pending_orders=data["pending"],
+        reviewed_orders=data["reviewed"],
+        page=data,
     )
 
 
+@app.route("/api/reviews", methods=["GET"])
+def api_reviews():
+    """JSON variant of /reviews, same cursors and page size cap."""
+    return jsonify(reviews_page_data())
+
+
 @app.route("/reviews/<int:order_id>", methods=["POST"])
 def submit_review(order_id):
     """Create or update a review for a completed order."""
@@ -517,19 +2626,27 @@ def submit_review(order_id):
         if rating > 5:
             rating = 5
 
-    session = SessionLocal()
+    session = write_session()
     try:
         order = (
             session.query(Order)
             .filter(Order.id == order_id, Order.status == "done")
             .first()
         )
+        if not order:
+            order = (
+                session.query(ArchivedOrder)
+                .filter(ArchivedOrder.id == order_id, ArchivedOrder.status == "done")
+                .first()
+            )
         if not order:
             session.close()
             return redirect(url_for("reviews_page"))
 
+        old_rating = order.review.rating if order.review is not None else None
         if order.review is None:
-            review = Review(
+            review_model = Review if isinstance(order, Order) else ArchivedReview
+            review = review_model(
                 order_id=order.id,
                 rating=rating,
                 comment=comment,
@@ -541,6 +2658,18 @@ def submit_review(order_id):
             order.review.comment = comment
             order.review.created_at = datetime.now(TORONTO_TZ)
 
+        # only rated reviews count towards the averages
+        review_delta = (rating is not None) - (old_rating is not None)
+        rating_delta = (rating or 0) - (old_rating or 0)
+        if review_delta or rating_delta:
+            rollup_ratings(session, rating_rows(
+                (review_delta, rating_delta, order.id, it.item_id, it.category_id)
+                for it in order.items
+            ))
+
+        record_order_change(session, order.id, "done", [
+            ("review-submitted", {"order_id": order.id, "rating": rating, "comment": comment}),
+        ])
         session.commit()
     finally:
         session.close()
@@ -548,5 +2677,937 @@ def submit_review(order_id):
     return redirect(url_for("reviews_page") + f"#order-{order_id}")
 
 
+# ---------- ANALYTICS ----------
+# Every read here comes from the rollup tables, never from orders/order_items.
+
+ANALYTICS_DEFAULT_DAYS = 7
+ANALYTICS_GROUPINGS = ("item", "category", "hour", "day")
+
+
+def analytics_range():
+    """[start, end) from ?start=YYYY-MM-DD&end=YYYY-MM-DD (end inclusive), Toronto days."""
+    today = datetime.now(TORONTO_TZ).replace(hour=0, minute=0, second=0, microsecond=0)
+
+    def parse_day(name, default):
+        value = request.args.get(name)
+        if not value:
+            return default
+        return datetime.strptime(value, "%Y-%m-%d").replace(tzinfo=TORONTO_TZ)
+
+    end = parse_day("end", today) + timedelta(days=1)
+    start = parse_day("start", end - timedelta(days=ANALYTICS_DEFAULT_DAYS))
+    return start, end
+
+
+def sales_report(session, start: datetime, end: datetime, by: str, item_id=None, category_id=None) -> list:
+    # Whole-day ranges read sales_daily (~24x fewer rows); only per-hour
+    # reports and ranges cut mid-day need sales_hourly.
+    if by != "hour" and local_day(start) == start and local_day(end) == end:
+        s, bucket_col = SalesDaily, SalesDaily.day
+    else:
+        s, bucket_col = SalesHourly, SalesHourly.hour
+    filters = [bucket_col >= start, bucket_col < end]
+    if item_id is not None:
+        filters.append(s.item_id == item_id)
+    if category_id:
+        filters.append(s.category_id == category_id)
+
+    if by == "item":
+        group = [s.item_id, s.name, s.category_id, s.category_name]
+    elif by == "category":
+        group = [s.category_id, s.category_name]
+    else:
+        group = [bucket_col.label("bucket")]
+
+    rows = session.execute(
+        select(*group, func.sum(s.qty).label("qty"), func.sum(s.orders).label("orders"))
+        .where(*filters)
+        .group_by(*group)
+        .order_by(*([bucket_col] if by in ("hour", "day") else [func.sum(s.qty).desc()]))
+    ).all()
+
+    if by in ("hour", "day"):
+        buckets = {}
+        for r in rows:
+            hour = local_hour(r.bucket)
+            label = hour.strftime("%Y-%m-%d %H:00") if by == "hour" else hour.strftime("%Y-%m-%d")
+            bucket = buckets.setdefault(label, {by: label, "qty": 0, "orders": 0})
+            bucket["qty"] += r.qty
+            bucket["orders"] += r.orders
+        return list(buckets.values())
+
+    return [dict(r._mapping) for r in rows]
+
+
+def ratings_report(session, scope: str) -> list:
+    rows = session.execute(
+        select(RatingRollup.key, RatingRollup.reviews, RatingRollup.rating_sum)
+        .where(RatingRollup.scope == scope, RatingRollup.reviews > 0)
+    ).all()
+    names = {}
+    if scope == "category":
+        names = {cat_id: cat["name"] for cat_id, cat in MENU.categories_by_id.items()}
+    elif scope == "item":
+        names = {str(item_id): item["name"] for item_id, item in MENU.by_id.items()}
+    report = [
+        {
+            "key": key,
+            "name": names.get(key, key),
+            "reviews": r_count,
+            "avg_rating": round(r_sum / r_count, 2),
+        }
+        for key, r_count, r_sum in rows
+    ]
+    report.sort(key=lambda r: r["avg_rating"], reverse=True)
+    return report
+
+
+@app.route("/api/analytics/sales")
+def api_analytics_sales():
+    """
+    Sales from the daily rollup (the hourly one for by=hour).
+    ?by=item|category|hour|day  &start=&end= (YYYY-MM-DD, default last 7 days)
+    &item_id=  &category_id=
+    """
+    by = request.args.get("by", "item")
+    if by not in ANALYTICS_GROUPINGS:
+        return jsonify({"success": False, "error": f"'by' must be one of {', '.join(ANALYTICS_GROUPINGS)}"}), 400
+    try:
+        start, end = analytics_range()
+    except ValueError:
+        return jsonify({"success": False, "error": "dates must be YYYY-MM-DD"}), 400
+
+    session = SessionLocal()
+    try:
+        rows = sales_report(
+            session, start, end, by,
+            item_id=request.args.get("item_id", type=int),
+            category_id=request.args.get("category_id"),
+        )
+    finally:
+        session.close()
+
+    return jsonify({
+        "start": start.strftime("%Y-%m-%d"),
+        "end": (end - timedelta(days=1)).strftime("%Y-%m-%d"),
+        "by": by,
+        "rows": rows,
+    })
+
+
+@app.route("/api/analytics/ratings")
+def api_analytics_ratings():
+    """Average rating per ?scope=category|item|all."""
+    scope = request.args.get("scope", "category")
+    if scope not in ("all", "category", "item"):
+        return jsonify({"success": False, "error": "'scope' must be all, category or item"}), 400
+    session = SessionLocal()
+    try:
+        rows = ratings_report(session, scope)
+    finally:
+        session.close()
+    return jsonify({"scope": scope, "rows": rows})
+
+
+@app.route("/analytics")
+def analytics_page():
+    try:
+        start, end = analytics_range()
+    except ValueError:
+        return redirect(url_for("analytics_page"))
+
+    session = SessionLocal()
+    try:
+        by_item = sales_report(session, start, end, "item")
+        by_category = sales_report(session, start, end, "category")
+        by_day = sales_report(session, start, end, "day")
+        ratings = ratings_report(session, "category")
+        overall = ratings_report(session, "all")
+    finally:
+        session.close()
+
+    return render_template(
+        "analytics.html",
+        start=start.strftime("%Y-%m-%d"),
+        end=(end - timedelta(days=1)).strftime("%Y-%m-%d"),
+        by_item=by_item,
+        by_category=by_category,
+        by_day=by_day,
+        ratings=ratings,
+        overall=overall[0] if overall else None,
+    )
+
+
+ROLLUP_BACKFILL_BATCH = 5000
+
+
+def backfill_rollups() -> dict:
+    """
+    Rebuild sales_hourly, sales_daily and rating_rollups from the live and archive tables,
+    streaming rows so memory stays flat. Run while no orders are being
+    completed (or accept that those few are counted twice / missed).
+    """
+    counts = {"order_lines": 0, "review_lines": 0}
+    with engine.begin() as conn:
+        conn.execute(SalesHourly.__table__.delete())
+        conn.execute(SalesDaily.__table__.delete())
+        conn.execute(RatingRollup.__table__.delete())
+
+    sources = (
+        (Order.__table__, OrderItem.__table__, Review.__table__),
+        (ArchivedOrder.__table__, ArchivedOrderItem.__table__, ArchivedReview.__table__),
+    )
+    for orders_t, items_t, reviews_t in sources:
+        lines = (
+            select(
+                orders_t.c.created_at, items_t.c.item_id, items_t.c.name, items_t.c.category_id,
+                items_t.c.category_name, items_t.c.qty, orders_t.c.id,
+            )
+            .join(items_t, items_t.c.order_id == orders_t.c.id)
+            .where(orders_t.c.status == "done")
+            .order_by(orders_t.c.id)
+        )
+        counts["order_lines"] += _backfill(lines, 6, sales_rows, rollup_sales)
+
+        rated = (
+            select(
+                literal(1), reviews_t.c.rating, orders_t.c.id, items_t.c.item_id, items_t.c.category_id,
+            )
+            .join(orders_t, orders_t.c.id == reviews_t.c.order_id)
+            .join(items_t, items_t.c.order_id == orders_t.c.id)
+            .where(reviews_t.c.rating.is_not(None))
+            .order_by(orders_t.c.id)
+        )
+        counts["review_lines"] += _backfill(rated, 2, rating_rows, rollup_ratings)
+    return counts
+
+
+def _backfill(query, order_col: int, fold, apply) -> int:
+    """
+    Stream `query` (ordered by the order id in column `order_col`) and fold it
+    into rollup increments in batches that never split an order.
+    """
+    total = 0
+    batch = []
+
+    def flush():
+        session = SessionLocal()
+        try:
+            apply(session, fold(batch))
+            session.commit()
+        finally:
+            session.close()
+
+    with engine.connect() as read_conn:
+        result = read_conn.execution_options(stream_results=True, yield_per=ROLLUP_BACKFILL_BATCH).execute(query)
+        for line in result:
+            if len(batch) >= ROLLUP_BACKFILL_BATCH and batch[-1][order_col] != line[order_col]:
+                flush()
+                total += len(batch)
+                batch = []
+            batch.append(tuple(line))
+        if batch:
+            flush()
+            total += len(batch)
+    return total
+
+
+@app.cli.command("backfill-rollups")
+def backfill_rollups_command():
+    """Rebuild the analytics rollups from all order history."""
+    create_app()
+    start = time.perf_counter()
+    counts = backfill_rollups()
+    print(f"Rolled up {counts['order_lines']} order lines and {counts['review_lines']} "
+          f"reviewed lines in {time.perf_counter() - start:.1f}s")
+
+
+# ---------- ARCHIVING ----------
+# Run from a scheduler (e.g. nightly):  flask --app app archive --days 1
+# Live tables then only hold the working set the kitchen and recent reviews need.
+
+ARCHIVE_AFTER_DAYS = int(os.environ.get("ARCHIVE_AFTER_DAYS", "1"))
+ARCHIVE_BATCH_SIZE = 1000
+ARCHIVABLE_STATUSES = ("done", "rejected")
+
+
+def archive_orders(older_than: datetime, batch_size: int = ARCHIVE_BATCH_SIZE) -> int:
+    """
+    Move finished orders created before `older_than` (with their items and
+    review) to the archive tables, one batch per transaction.
+    Returns the number of orders moved.
+    """
+    orders_t = Order.__table__
+    items_t = OrderItem.__table__
+    reviews_t = Review.__table__
+    moved = 0
+    while True:
+        # reads the batch, then writes it: take the write lock first on SQLite
+        with write_transaction() as conn:
+            ids = conn.execute(
+                select(orders_t.c.id)
+                .where(orders_t.c.status.in_(ARCHIVABLE_STATUSES), orders_t.c.created_at < older_than)
+                .order_by(orders_t.c.id)
+                .limit(batch_size)
+            ).scalars().all()
+            if not ids:
+                return moved
+
+            archived_at = datetime.now(TORONTO_TZ)
+            conn.execute(ArchivedOrder.__table__.insert().from_select(
+                ["id", "customer_name", "table", "status", "created_at", "archived_at"],
+                select(
+                    orders_t.c.id, orders_t.c.customer_name, orders_t.c.table,
+                    orders_t.c.status, orders_t.c.created_at, literal(archived_at),
+                ).where(orders_t.c.id.in_(ids)),
+            ))
+            conn.execute(ArchivedOrderItem.__table__.insert().from_select(
+                ["id", "order_id", "item_id", "name", "category_id", "category_name", "qty"],
+                select(
+                    items_t.c.id, items_t.c.order_id, items_t.c.item_id, items_t.c.name,
+                    items_t.c.category_id, items_t.c.category_name, items_t.c.qty,
+                ).where(items_t.c.order_id.in_(ids)),
+            ))
+            conn.execute(ArchivedReview.__table__.insert().from_select(
+                ["order_id", "rating", "comment", "created_at"],
+                select(
+                    reviews_t.c.order_id, reviews_t.c.rating, reviews_t.c.comment, reviews_t.c.created_at,
+                ).where(reviews_t.c.order_id.in_(ids)),
+            ))
+            conn.execute(reviews_t.delete().where(reviews_t.c.order_id.in_(ids)))
+            conn.execute(items_t.delete().where(items_t.c.order_id.in_(ids)))
+            conn.execute(orders_t.delete().where(orders_t.c.id.in_(ids)))
+        moved += len(ids)
+
+
+@app.cli.command("archive")
+@click.option("--days", default=ARCHIVE_AFTER_DAYS, show_default=True,
+              help="Archive finished orders created more than this many days ago.")
+@click.option("--batch-size", default=ARCHIVE_BATCH_SIZE, show_default=True)
+def archive_command(days, batch_size):
+    """Move finished orders out of the live tables."""
+    create_app()
+    cutoff = datetime.now(TORONTO_TZ) - timedelta(days=days)
+    start = time.perf_counter()
+    moved = archive_orders(cutoff, batch_size)
+    print(f"Archived {moved} orders created before {cutoff:%Y-%m-%d %H:%M} "
+          f"in {time.perf_counter() - start:.1f}s")
+
+
+# ---------- EXPORT ----------
+# Order history (live + archive) as CSV or JSONL, streamed from a server-side
+# cursor so memory stays flat however many orders there are.
+#   flask --app app export --format jsonl --start 2025-01-01 -o orders.jsonl
+#   GET /api/export?format=csv&start=2025-01-01&end=2025-01-31
+
+EXPORT_FORMATS = {"csv": "text/csv", "jsonl": "application/x-ndjson"}
+EXPORT_BATCH = 1000
+EXPORT_CSV_COLUMNS = (
+    "order_id", "created_at", "customer_name", "table", "status", "archived",
+    "item_id", "item_name", "category_id", "category_name", "qty",
+    "rating", "comment", "reviewed_at",
+)
+
+
+def export_range(start, end):
+    """[start, end) from YYYY-MM-DD strings (end inclusive), Toronto days. Either may be None."""
+    def parse_day(value):
+        return datetime.strptime(value, "%Y-%m-%d").replace(tzinfo=TORONTO_TZ) if value else None
+
+    start_dt = parse_day(start)
+    end_dt = parse_day(end)
+    return start_dt, end_dt + timedelta(days=1) if end_dt else None
+
+
+def export_lines(start=None, end=None):
+    """
+    One row per order line (orders without lines get one row of NULLs), with
+    the review alongside. Archived orders first, so rows come out in id order.
+    """
+    sources = (
+        (True, ArchivedOrder.__table__, ArchivedOrderItem.__table__, ArchivedReview.__table__),
+        (False, Order.__table__, OrderItem.__table__, Review.__table__),
+    )
+    with engine.connect() as conn:
+        conn = conn.execution_options(stream_results=True, yield_per=EXPORT_BATCH)
+        for archived, orders_t, items_t, reviews_t in sources:
+            query = (
+                select(
+                    orders_t.c.id, orders_t.c.created_at, orders_t.c.customer_name, orders_t.c.table,
+                    orders_t.c.status, literal(archived),
+                    items_t.c.item_id, items_t.c.name, items_t.c.category_id, items_t.c.category_name,
+                    items_t.c.qty, reviews_t.c.rating, reviews_t.c.comment, reviews_t.c.created_at,
+                )
+                .outerjoin(items_t, items_t.c.order_id == orders_t.c.id)
+                .outerjoin(reviews_t, reviews_t.c.order_id == orders_t.c.id)
+                .order_by(orders_t.c.id, items_t.c.id)
+            )
+            if start is not None:
+                query = query.where(orders_t.c.created_at >= start)
+            if end is not None:
+                query = query.where(orders_t.c.created_at < end)
+            yield from conn.execute(query)
+
+
+def _export_time(dt_obj):
+    return stored_local_time(dt_obj).isoformat() if dt_obj else None
+
+
+def export_csv(start=None, end=None):
+    """CSV text in chunks of EXPORT_BATCH rows, header first."""
+    buf = io.StringIO()
+    writer = csv.writer(buf)
+    writer.writerow(EXPORT_CSV_COLUMNS)
+    for n, row in enumerate(export_lines(start, end), 1):
+        row = list(row)
+        row[1] = _export_time(row[1])
+        row[-1] = _export_time(row[-1])
+        writer.writerow(row)
+        if n % EXPORT_BATCH == 0:
+            yield buf.getvalue()
+            buf.seek(0)
+            buf.truncate()
+    yield buf.getvalue()
+
+
+def export_jsonl(start=None, end=None):
+    """One JSON object per order (items and review nested), in chunks."""
+    chunk = []
+    order = None
+    for (order_id, created_at, customer_name, table, status, archived, item_id, name,
+         category_id, category_name, qty, rating, comment, reviewed_at) in export_lines(start, end):
+        if order is None or order["id"] != order_id:
+            if order is not None:
+                chunk.append(json.dumps(order) + "\n")
+                if len(chunk) >= EXPORT_BATCH:
+                    yield "".join(chunk)
+                    chunk = []
+            order = {
+                "id": order_id,
+                "created_at": _export_time(created_at),
+                "customer_name": customer_name,
+                "table": table,
+                "status": status,
+                "archived": bool(archived),
+                "items": [],
+                "review": None if reviewed_at is None else {
+                    "rating": rating, "comment": comment, "created_at": _export_time(reviewed_at),
+                },
+            }
+        if item_id is not None:
+            order["items"].append({
+                "item_id": item_id, "name": name, "category_id": category_id,
+                "category_name": category_name, "qty": qty,
+            })
+    if order is not None:
+        chunk.append(json.dumps(order) + "\n")
+    yield "".join(chunk)
+
+
+def export_chunks(fmt: str, start=None, end=None):
+    return export_csv(start, end) if fmt == "csv" else export_jsonl(start, end)
+
+
+@app.route("/api/export")
+def api_export():
+    """
+    Stream order history. ?format=csv|jsonl (default jsonl)
+    &start=&end= (YYYY-MM-DD, inclusive; default everything)
+    """
+    fmt = request.args.get("format", "jsonl")
+    if fmt not in EXPORT_FORMATS:
+        return jsonify({"success": False, "error": "'format' must be csv or jsonl"}), 400
+    try:
+        start, end = export_range(request.args.get("start"), request.args.get("end"))
+    except ValueError:
+        return jsonify({"success": False, "error": "dates must be YYYY-MM-DD"}), 400
+
+    filename = "orders-{}-{}.{}".format(
+        request.args.get("start") or "all", request.args.get("end") or "now", fmt
+    )
+    return Response(
+        export_chunks(fmt, start, end),
+        mimetype=EXPORT_FORMATS[fmt],
+        headers={"Content-Disposition": f"attachment; filename={filename}"},
+    )
+
+
+@app.cli.command("export")
+@click.option("--format", "fmt", type=click.Choice(list(EXPORT_FORMATS)), default="jsonl", show_default=True)
+@click.option("--start", help="First day to include (YYYY-MM-DD).")
+@click.option("--end", help="Last day to include (YYYY-MM-DD).")
+@click.option("-o", "--output", type=click.File("w", encoding="utf-8"), default="-",
+              help="File to write (default stdout).")
+def export_command(fmt, start, end, output):
+    """Stream order history (live and archived) as CSV or JSONL."""
+    create_app()
+    try:
+        start_dt, end_dt = export_range(start, end)
+    except ValueError:
+        raise click.BadParameter("dates must be YYYY-MM-DD")
+    for chunk in export_chunks(fmt, start_dt, end_dt):
+        output.write(chunk)
+
+
+# ---------- IMPORT ----------
+# Load historical orders in the export format (JSONL, or CSV with one row per
+# line) with batched executemany. Finished orders older than ARCHIVE_AFTER_DAYS
+# go straight into the archive tables, the rest into orders / order_items / reviews.
+#   flask --app app import-orders history.jsonl
+# Order ids are kept (shifted by --id-offset), and ids already present in the
+# live or archive tables are skipped, so re-running the same file is a no-op.
+
+IMPORT_BATCH = 1000
+IMPORT_STATUSES = ("new", "confirmed", "done", "rejected")
+IMPORT_MAX_ERRORS_SHOWN = 20
+
+
+class ImportRowError(ValueError):
+    pass
+
+
+def _import_time(value):
+    """ISO timestamp from a file; naive values are Toronto wall-clock time."""
+    if not value:
+        return None
+    if not isinstance(value, datetime):
+        value = datetime.fromisoformat(value)
+    return stored_local_time(value)
+
+
+def read_jsonl_orders(lines):
+    for line in lines:
+        if line.strip():
+            yield json.loads(line)
+
+
+def read_csv_orders(lines):
+    """Group consecutive rows with the same order_id back into export-shaped orders."""
+    order = None
+    for row in csv.DictReader(lines):
+        if order is None or str(order["id"]) != row["order_id"]:
+            if order is not None:
+                yield order
+            order = {
+                "id": row["order_id"],
+                "created_at": row.get("created_at"),
+                "customer_name": row.get("customer_name"),
+                "table": row.get("table"),
+                "status": row.get("status"),
+                "items": [],
+                "review": None,
+            }
+            if row.get("rating") or row.get("comment") or row.get("reviewed_at"):
+                order["review"] = {
+                    "rating": row.get("rating"),
+                    "comment": row.get("comment"),
+                    "created_at": row.get("reviewed_at"),
+                }
+        if row.get("item_id"):
+            order["items"].append({"item_id": row["item_id"], "qty": row.get("qty")})
+    if order is not None:
+        yield order
+
+
+def clean_import_order(raw: dict, id_offset: int = 0) -> dict:
+    """
+    Validate one order against MENU and normalise it into insertable rows.
+    Item names and categories always come from MENU. Raises ImportRowError.
+    """
+    try:
+        order_id = int(raw["id"]) + id_offset
+        created_at = _import_time(raw.get("created_at"))
+    except (KeyError, TypeError, ValueError) as e:
+        raise ImportRowError(f"bad id or created_at: {e}")
+    if created_at is None:
+        raise ImportRowError(f"order {order_id}: missing created_at")
+    status = raw.get("status") or "done"
+    if status not in IMPORT_STATUSES:
+        raise ImportRowError(f"order {order_id}: unknown status {status!r}")
+
+    items = []
+    for line in raw.get("items") or ():
+        try:
+            item_id = int(line["item_id"])
+            qty = int(line.get("qty") or 1)
+        except (KeyError, TypeError, ValueError):
+            raise ImportRowError(f"order {order_id}: bad item line {line!r}")
+        item = MENU.get(item_id)
+        if item is None:
+            raise ImportRowError(f"order {order_id}: item {item_id} is not on the menu")
+        if qty < 1:
+            raise ImportRowError(f"order {order_id}: qty must be positive for item {item_id}")
+        items.append({
+            "order_id": order_id,
+            "item_id": item_id,
+            "name": item["name"],
+            "category_id": item["category_id"],
+            "category_name": item["category_name"],
+            "qty": qty,
+            "status": status,
+        })
+    if not items and status != "rejected":
+        raise ImportRowError(f"order {order_id}: no items")
+
+    review = None
+    raw_review = raw.get("review")
+    if raw_review:
+        if status != "done":
+            raise ImportRowError(f"order {order_id}: only done orders can have a review")
+        try:
+            rating = int(raw_review["rating"]) if raw_review.get("rating") not in (None, "") else None
+            reviewed_at = _import_time(raw_review.get("created_at")) or created_at
+        except (TypeError, ValueError) as e:
+            raise ImportRowError(f"order {order_id}: bad review: {e}")
+        if rating is not None:
+            rating = min(max(rating, 1), 5)
+        review = {
+            "order_id": order_id,
+            "rating": rating,
+            "comment": (raw_review.get("comment") or "")[:1000],
+            "created_at": reviewed_at,
+        }
+
+    return {
+        "order": {
+            "id": order_id,
+            "customer_name": (raw.get("customer_name") or "Guest")[:100],
+            "table": (raw.get("table") or "")[:50],
+            "status": status,
+            "created_at": created_at,
+        },
+        "items": items,
+        "review": review,
+    }
+
+
+def reserve_order_item_ids(session, count: int) -> list:
+    """
+    Ids for lines written straight to the archive, taken from order_items' own
+    sequence so a live line archived later can never collide with them.
+    """
+    if engine.dialect.name == "postgresql":
+        return session.execute(
+            text("SELECT nextval(pg_get_serial_sequence('order_items', 'id')) FROM generate_series(1, :n)"),
+            {"n": count},
+        ).scalars().all()
+    conn = session.connection()
+    last = conn.execute(text("SELECT seq FROM sqlite_sequence WHERE name = 'order_items'")).scalar() or 0
+    bump_sqlite_sequence(conn, "order_items", last + count)
+    return list(range(last + 1, last + count + 1))
+
+
+def import_batch(session, batch: list, archive_before: datetime) -> tuple:
+    """
+    Insert the orders in `batch` whose ids are not already taken, with their
+    items and reviews, and add them to the rollups. Finished orders created
+    before `archive_before` are written to the archive tables instead of the
+    live ones. Returns (orders, lines) inserted.
+    """
+    ids = [o["order"]["id"] for o in batch]
+    taken = set(session.execute(select(Order.id).where(Order.id.in_(ids))).scalars())
+    taken.update(session.execute(select(ArchivedOrder.id).where(ArchivedOrder.id.in_(ids))).scalars())
+    fresh = []
+    for o in batch:
+        if o["order"]["id"] not in taken:
+            taken.add(o["order"]["id"])
+            fresh.append(o)
+    if not fresh:
+        return 0, 0
+
+    live, cold = [], []
+    for o in fresh:
+        finished = o["order"]["status"] in ARCHIVABLE_STATUSES and o["order"]["created_at"] < archive_before
+        (cold if finished else live).append(o)
+
+    if live:
+        session.execute(Order.__table__.insert(), [o["order"] for o in live])
+        items = [it for o in live for it in o["items"]]
+        if items:
+            session.execute(OrderItem.__table__.insert(), items)
+        reviews = [o["review"] for o in live if o["review"] is not None]
+        if reviews:
+            session.execute(Review.__table__.insert(), reviews)
+    if cold:
+        archived_at = datetime.now(TORONTO_TZ)
+        session.execute(ArchivedOrder.__table__.insert(), [{**o["order"], "archived_at": archived_at} for o in cold])
+        items = [it for o in cold for it in o["items"]]
+        if items:
+            # archived lines have no status column: they are all finished
+            session.execute(ArchivedOrderItem.__table__.insert(), [
+                {"id": item_id, **{k: v for k, v in it.items() if k != "status"}}
+                for it, item_id in zip(items, reserve_order_item_ids(session, len(items)))
+            ])
+        reviews = [o["review"] for o in cold if o["review"] is not None]
+        if reviews:
+            session.execute(ArchivedReview.__table__.insert(), reviews)
+        # ids written only to the archive must not be handed out to new orders
+        bump_sqlite_sequence(session.connection(), "orders", max(o["order"]["id"] for o in cold))
+
+    rollup_sales(session, sales_rows(
+        (o["order"]["created_at"], it["item_id"], it["name"], it["category_id"],
+         it["category_name"], it["qty"], it["order_id"])
+        for o in fresh if o["order"]["status"] == "done" for it in o["items"]
+    ))
+    rollup_ratings(session, rating_rows(
+        (1, o["review"]["rating"], it["order_id"], it["item_id"], it["category_id"])
+        for o in fresh if o["review"] is not None and o["review"]["rating"] is not None
+        for it in o["items"]
+    ))
+
+    # Anything still open has to reach the kitchen screens like a new order would.
+    for o in fresh:
+        order = o["order"]
+        if order["status"] in ACTIVE_STATUSES:
+            data = kitchen_order(order["id"], order["customer_name"], order["table"], order["status"],
+                                 order["created_at"], [
+                kitchen_item(it["item_id"], it["name"], it["qty"], it["category_id"], it["category_name"], it["status"])
+                for it in o["items"]
+            ])
+            record_order_change(session, order["id"], order["status"], [("order-created", data)])
+    return len(fresh), sum(len(o["items"]) for o in fresh)
+
+
+def import_orders(orders, id_offset: int = 0, batch_size: int = IMPORT_BATCH) -> dict:
+    """Load an iterable of export-shaped order dicts. Invalid orders are skipped and reported."""
+    counts = {"read": 0, "imported": 0, "lines": 0, "skipped": 0, "invalid": 0, "errors": []}
+    archive_before = datetime.now(TORONTO_TZ) - timedelta(days=ARCHIVE_AFTER_DAYS)
+
+    def flush(batch):
+        session = write_session()
+        try:
+            imported, lines = import_batch(session, batch, archive_before)
+            session.commit()
+        finally:
+            session.close()
+        counts["imported"] += imported
+        counts["lines"] += lines
+        counts["skipped"] += len(batch) - imported
+
+    batch = []
+    for raw in orders:
+        counts["read"] += 1
+        try:
+            batch.append(clean_import_order(raw, id_offset))
+        except ImportRowError as e:
+            counts["invalid"] += 1
+            if len(counts["errors"]) < IMPORT_MAX_ERRORS_SHOWN:
+                counts["errors"].append(str(e))
+            continue
+        if len(batch) >= batch_size:
+            flush(batch)
+            batch = []
+    if batch:
+        flush(batch)
+
+    if engine.dialect.name == "postgresql" and counts["imported"]:
+        # Explicit ids don't advance the serial; move it past what we loaded.
+        with engine.begin() as conn:
+            conn.execute(text(
+                "SELECT setval(pg_get_serial_sequence('orders', 'id'), "
+                "GREATEST((SELECT MAX(id) FROM orders), (SELECT COALESCE(MAX(id), 1) FROM archived_orders)))"
+            ))
+    return counts
+
+
+@app.cli.command("import-orders")
+@click.argument("source", type=click.File("r", encoding="utf-8"))
+@click.option("--format", "fmt", type=click.Choice(list(EXPORT_FORMATS)),
+              help="Defaults to the file extension (.csv or .jsonl).")
+@click.option("--id-offset", default=0, show_default=True,
+              help="Added to every order id, e.g. to keep another location's ids apart.")
+@click.option("--batch-size", default=IMPORT_BATCH, show_default=True)
+def import_orders_command(source, fmt, id_offset, batch_size):
+    """Bulk-load historical orders from an export file (or - for stdin)."""
+    create_app()
+    fmt = fmt or ("csv" if source.name.endswith(".csv") else "jsonl")
+    reader = read_csv_orders if fmt == "csv" else read_jsonl_orders
+    start = time.perf_counter()
+    counts = import_orders(reader(source), id_offset, batch_size)
+    elapsed = max(time.perf_counter() - start, 1e-9)
+    for error in counts["errors"]:
+        print(f"invalid: {error}")
+    print(f"Read {counts['read']} orders: imported {counts['imported']} "
+          f"({counts['lines']} lines), skipped {counts['skipped']} already present, "
+          f"{counts['invalid']} invalid, in {elapsed:.1f}s "
+          f"({counts['read'] / elapsed:.0f} orders/s, {counts['lines'] / elapsed:.0f} lines/s)")
+
+
+# ---------- SYNTHETIC DATA ----------
+# Realistic-looking history for local scale testing, loaded through the importer
+# (so rollups stay right) and then archived like production would be:
+#   flask --app app seed --orders 1000000 --days 365
+# Never run this against the real database.
+
+SEED_NAMES = ("Aman", "Priya", "Harpreet", "Simran", "Rohan", "Neha", "Gurpreet", "Arjun", "Kiran", "Guest")
+SEED_BASKET_SIZES = (1, 2, 2, 3, 3, 3, 4, 4, 5, 6, 8)
+SEED_RATINGS = (2, 3, 4, 4, 4, 5, 5, 5, 5)
+
+
+def parse_status_mix(value: str) -> dict:
+    """'done=93,rejected=7' -> {'done': 93.0, 'rejected': 7.0}"""
+    mix = {}
+    for part in value.split(","):
+        status, _, weight = part.partition("=")
+        status = status.strip()
+        if status not in IMPORT_STATUSES:
+            raise ValueError(f"unknown status {status!r}")
+        mix[status] = float(weight or 1)
+    if not mix or sum(mix.values()) <= 0:
+        raise ValueError("status mix is empty")
+    return mix
+
+
+def synthetic_orders(count: int, days: float, status_mix: dict, review_rate: float,
+                     first_id: int, active: int = 0, seed: int = 1):
+    """
+    Export-shaped orders with ids from first_id, created at increasing times
+    spread over the last `days`. The last `active` are new/confirmed orders
+    from the past hour, the rest follow status_mix.
+    """
+    rng = random.Random(seed)
+    statuses, weights = list(status_mix), list(status_mix.values())
+    now = datetime.now(TORONTO_TZ)
+    history_start = now - timedelta(days=days)
+    history_span = max((now - timedelta(hours=1) - history_start).total_seconds(), 0)
+    history = max(count - active, 0)
+
+    for i in range(count):
+        if i < history:
+            created_at = history_start + timedelta(seconds=history_span * (i + rng.random()) / history)
+            status = rng.choices(statuses, weights)[0]
+        else:
+            created_at = now - timedelta(seconds=3600 * (count - i) / max(active, 1))
+            status = rng.choice(ACTIVE_STATUSES)
+        items = [] if status == "rejected" else [
+            {"item_id": item["id"], "qty": rng.choice((1, 1, 1, 2, 2, 3))}
+            for item in rng.sample(MENU.items, rng.choice(SEED_BASKET_SIZES))
+        ]
+        review = None
+        if status == "done" and rng.random() < review_rate:
+            review = {
+                "rating": rng.choice(SEED_RATINGS),
+                "comment": rng.choice(("", "", "Great food", "A bit slow", "Loved the naan")),
+                "created_at": (created_at + timedelta(minutes=rng.randint(20, 90))).isoformat(),
+            }
+        yield {
+            "id": first_id + i,
+            "created_at": created_at.isoformat(),
+            "customer_name": rng.choice(SEED_NAMES),
+            "table": str(rng.randint(1, 30)),
+            "status": status,
+            "items": items,
+            "review": review,
+        }
+
+
+def next_free_order_id() -> int:
+    with engine.connect() as conn:
+        return max(
+            conn.execute(select(func.max(Order.id))).scalar() or 0,
+            conn.execute(select(func.max(ArchivedOrder.id))).scalar() or 0,
+        ) + 1
+
+
+@app.cli.command("seed")
+@click.option("--orders", default=10000, show_default=True, help="Orders to add.")
+@click.option("--days", default=90.0, show_default=True, help="Spread their created_at over this many days.")
+@click.option("--status-mix", default="done=93,rejected=7", show_default=True,
+              help="Relative weights of historical statuses.")
+@click.option("--active", default=20, show_default=True, help="Of which new/confirmed in the last hour.")
+@click.option("--review-rate", default=0.4, show_default=True, help="Share of done orders with a review.")
+@click.option("--seed", "rng_seed", default=1, show_default=True)
+@click.option("--archive/--no-archive", default=True, show_default=True,
+              help=f"Archive finished orders older than ARCHIVE_AFTER_DAYS ({ARCHIVE_AFTER_DAYS}) afterwards.")
+def seed_command(orders, days, status_mix, active, review_rate, rng_seed, archive):
+    """Add synthetic order history (for local scale testing only)."""
+    create_app()
+    try:
+        mix = parse_status_mix(status_mix)
+    except ValueError as e:
+        raise click.BadParameter(str(e), param_hint="--status-mix")
+    start = time.perf_counter()
+    counts = import_orders(synthetic_orders(
+        orders, days, mix, review_rate, next_free_order_id(), min(active, orders), rng_seed,
+    ))
+    print(f"Seeded {counts['imported']} orders ({counts['lines']} lines) "
+          f"in {time.perf_counter() - start:.1f}s")
+    if archive:
+        start = time.perf_counter()
+        moved = archive_orders(datetime.now(TORONTO_TZ) - timedelta(days=ARCHIVE_AFTER_DAYS))
+        print(f"Archived {moved} orders in {time.perf_counter() - start:.1f}s")
+
+
+# ---------- APP FACTORY ----------
+# Importing this module only defines things. create_app() does the per-process
+# setup: create the engine and check (one query) that the schema is current.
+#   gunicorn 'app:create_app()'     (with preload_app this runs once, in the master)
+# Anything that skips it -- the test client, plain `app:app` -- gets it on the
+# first app context instead. CLI commands only get the engine there and call
+# create_app() themselves when they touch data, so `flask migrate` owns the
+# schema step and reports what it applied.
+
+AUTO_MIGRATE = env_flag("AUTO_MIGRATE", True)
+STARTUP_BUDGET_SECONDS = float(os.environ.get("STARTUP_BUDGET_SECONDS", "3"))
+
+_ready = False
+_ready_lock = threading.Lock()
+_boot_seconds = None
+_first_response_seen = False
+
+
+def record_startup(phase: str, seconds: float):
+    """Export a startup phase and check it against the budget."""
+    APP_STARTUP_SECONDS.labels(phase).set(seconds)
+    if seconds > STARTUP_BUDGET_SECONDS:
+        app.logger.warning("startup %s took %.2fs (budget %.2fs)", phase, seconds, STARTUP_BUDGET_SECONDS)
+    else:
+        app.logger.info("startup %s took %.2fs", phase, seconds)
+
+
+def create_app():
+    """
+    Make the app ready to serve and return it. If the schema is behind it is
+    migrated here (AUTO_MIGRATE, the default) or left for `flask migrate`
+    (AUTO_MIGRATE=0, when a release step owns migrations).
+    """
+    global _ready, _boot_seconds
+    with _ready_lock:
+        if _ready:
+            return app
+        init_engine()
+        if not schema_is_current():
+            if AUTO_MIGRATE:
+                applied = prepare_database()
+                app.logger.info("applied migrations %s", applied)
+            else:
+                app.logger.warning("database schema is behind; run `flask --app app migrate`")
+        _ready = True
+        _boot_seconds = time.perf_counter() - IMPORT_STARTED
+    record_startup("boot", _boot_seconds)
+    return app
+
+
+@appcontext_pushed.connect_via(app)
+def _create_app_on_first_context(sender, **extra):
+    if _ready:
+        return
+    if click.get_current_context(silent=True) is not None:
+        init_engine()
+        return
+    create_app()
+
+
+@app.after_request
+def _record_first_response(response):
+    # boot plus the cold first request (connections, templates, caches); idle
+    # time waiting for that request to arrive doesn't count
+    global _first_response_seen
+    if not _first_response_seen and "request_started" in g:
+        _first_response_seen = True
+        record_startup("first_response", _boot_seconds + time.perf_counter() - g.request_started)
+    return response
+
+
 if __name__ == "__main__":
-    app.run(host="0.0.0.0", port=5001, debug=True)
+    create_app().run(host="0.0.0.0", port=5001, debug=True)
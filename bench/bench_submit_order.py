@@ -0,0 +1,100 @@
+"""
+Orders/sec for order creation: the old per-object ORM path vs create_order().
+
+    python bench/bench_submit_order.py                      # temporary SQLite file
+    python bench/bench_submit_order.py postgresql://...     # Postgres (tables are created, rows are left behind)
+
+Options: --orders N (per run, default 500), --lines 3,30 (basket sizes).
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("database_url", nargs="?", help="defaults to a temporary SQLite file")
+    parser.add_argument("--orders", type=int, default=500)
+    parser.add_argument("--lines", default="3,30", help="comma separated basket sizes")
+    return parser.parse_args()
+
+
+def legacy_create_order(app, session, customer_name, table, created_at, ordered_items):
+    """The pre-bulk submit_order body: add(), flush(), one add() per line."""
+    order_db = app.Order(customer_name=customer_name, table=table, status="new", created_at=created_at)
+    session.add(order_db)
+    session.flush()
+    for it in ordered_items:
+        session.add(app.OrderItem(
+            order_id=order_db.id,
+            item_id=it["item_id"],
+            name=it["name"],
+            qty=it["qty"],
+            category_id=it["category_id"],
+            category_name=it["category_name"],
+        ))
+    app.record_order_change(session, order_db.id, "new")
+    return order_db.id
+
+
+def basket(menu, lines):
+    return [
+        {
+            "item_id": item["id"],
+            "name": item["name"],
+            "qty": random.randint(1, 4),
+            "category_id": item["category_id"],
+            "category_name": item["category_name"],
+        }
+        for item in random.sample(menu, lines)
+    ]
+
+
+def run(app, create, orders, lines):
+    menu = app.all_menu_items_with_category()
+    baskets = [basket(menu, lines) for _ in range(orders)]
+    start = time.perf_counter()
+    for items in baskets:
+        session = app.SessionLocal()
+        try:
+            create(session, "Bench", "T1", datetime.now(app.TORONTO_TZ), items)
+            session.commit()
+        finally:
+            session.close()
+    return orders / (time.perf_counter() - start)
+
+
+def main():
+    args = parse_args()
+    tmpdir = None
+    url = args.database_url
+    if not url:
+        tmpdir = tempfile.TemporaryDirectory()
+        url = f"sqlite:///{os.path.join(tmpdir.name, 'bench.db')}"
+    os.environ["DATABASE_URL"] = url
+
+    sys.path.insert(0, ROOT)
+    import app
+
+    app.create_app()
+    legacy = lambda *a: legacy_create_order(app, *a)  # noqa: E731
+    print(f"database: {app.engine.url.render_as_string(hide_password=True)}")
+    print(f"{'lines':>5}  {'orm orders/s':>12}  {'bulk orders/s':>13}  {'speedup':>7}")
+    for lines in (int(n) for n in args.lines.split(",")):
+        before = run(app, legacy, args.orders, lines)
+        after = run(app, app.create_order, args.orders, lines)
+        print(f"{lines:>5}  {before:>12.0f}  {after:>13.0f}  {after / before:>6.2f}x")
+
+    if tmpdir:
+        app.engine.dispose()
+        tmpdir.cleanup()
+
+
+if __name__ == "__main__":
+    main()
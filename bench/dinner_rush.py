@@ -0,0 +1,400 @@
+"""
+End-to-end dinner-rush load test against a real gunicorn server.
+
+    python bench/dinner_rush.py                                 # temporary SQLite file
+    python bench/dinner_rush.py --database-url postgresql://... # local Postgres
+    python bench/dinner_rush.py --url http://127.0.0.1:8000     # a server that is already running
+
+Actors, each a thread with its own keep-alive connection:
+- customers post /order with 1-8 line baskets drawn from MENU_CATEGORIES
+- kitchen screens poll /api/orders with If-None-Match (or hold /api/orders/stream with --stream)
+- staff confirm new orders (now and then rejecting a line) and complete confirmed ones
+- reviewers load /reviews and /api/reviews and rate some pending orders
+
+Prints p50/p95/p99 latency and throughput per endpoint as JSON (stdout or
+--output) with a short table on stderr, so runs can be diffed across commits.
+"""
+import argparse
+import http.client
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timezone
+from urllib.parse import urlencode, urlsplit
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Share of basket lines per category; unknown categories get 1.
+CATEGORY_WEIGHTS = {"roti": 3, "sabzi": 2, "paneer_special": 2, "basmati_ka_khajana": 1.5, "snacks": 1.5}
+BASKET_SIZES = {1: 10, 2: 25, 3: 25, 4: 18, 5: 10, 6: 7, 8: 5}
+REJECT_CHANCE = 0.05
+REVIEW_CHANCE = 0.5
+# longer than the server's ORDER_STREAM_HEARTBEAT (15s by default), so an idle stream isn't a failure
+STREAM_READ_TIMEOUT = 20
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", help="target a running server instead of starting gunicorn")
+    parser.add_argument("--database-url", help="database for the started server (default: temporary SQLite file)")
+    parser.add_argument("--workers", type=int, default=2, help="gunicorn workers for the started server")
+    parser.add_argument("--duration", type=float, default=30, help="seconds of load")
+    parser.add_argument("--customers", type=int, default=20)
+    parser.add_argument("--think", type=float, default=1.0, help="mean seconds between a customer's orders")
+    parser.add_argument("--screens", type=int, default=4)
+    parser.add_argument("--poll-interval", type=float, default=4.0, help="same as the kitchen page fallback")
+    parser.add_argument("--stream", action="store_true", help="screens hold /api/orders/stream instead of polling")
+    parser.add_argument("--staff", type=int, default=2)
+    parser.add_argument("--cook-time", type=float, default=3.0, help="seconds between confirm and done")
+    parser.add_argument("--reviewers", type=int, default=2)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--output", help="write the JSON report here instead of stdout")
+    return parser.parse_args()
+
+
+class Recorder:
+    """Latencies (ms) and failures per endpoint label, shared by all actors."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.samples = {}
+        self.errors = {}
+        self.counters = {}
+
+    def record(self, label, ms, ok):
+        with self.lock:
+            self.samples.setdefault(label, []).append(ms)
+            if not ok:
+                self.errors[label] = self.errors.get(label, 0) + 1
+
+    def count(self, name, n=1):
+        with self.lock:
+            self.counters[name] = self.counters.get(name, 0) + n
+
+    def report(self, elapsed):
+        endpoints = {}
+        for label, samples in sorted(self.samples.items()):
+            samples = sorted(samples)
+            endpoints[label] = {
+                "requests": len(samples),
+                "errors": self.errors.get(label, 0),
+                "rps": round(len(samples) / elapsed, 2),
+                "mean_ms": round(sum(samples) / len(samples), 2),
+                "p50_ms": percentile(samples, 50),
+                "p95_ms": percentile(samples, 95),
+                "p99_ms": percentile(samples, 99),
+                "max_ms": round(samples[-1], 2),
+            }
+        total = sum(e["requests"] for e in endpoints.values())
+        return {
+            "elapsed_s": round(elapsed, 2),
+            "requests": total,
+            "errors": sum(e["errors"] for e in endpoints.values()),
+            "rps": round(total / elapsed, 2),
+            "counters": dict(sorted(self.counters.items())),
+            "endpoints": endpoints,
+        }
+
+
+def percentile(sorted_samples, pct):
+    """Nearest-rank percentile of an already sorted list."""
+    rank = max(1, -(-len(sorted_samples) * pct // 100))
+    return round(sorted_samples[int(rank) - 1], 2)
+
+
+class Client:
+    """One keep-alive HTTP connection that times every request it makes."""
+
+    def __init__(self, base_url, recorder, timeout=30):
+        parts = urlsplit(base_url)
+        self.host, self.port = parts.hostname, parts.port or 80
+        self.recorder = recorder
+        self.timeout = timeout
+        self.conn = None
+        self.last_headers = {}
+
+    def request(self, label, method, path, body=None, headers=None, expect=(200,)):
+        headers = dict(headers or {})
+        if isinstance(body, dict):
+            body = urlencode(body)
+            headers["Content-Type"] = "application/x-www-form-urlencoded"
+        start = time.perf_counter()
+        status, data = None, b""
+        for attempt in (1, 2):
+            try:
+                if self.conn is None:
+                    self.conn = http.client.HTTPConnection(self.host, self.port, timeout=self.timeout)
+                self.conn.request(method, path, body=body, headers=headers)
+                resp = self.conn.getresponse()
+                status, data = resp.status, resp.read()
+                self.last_headers = resp.headers
+                break
+            except (http.client.HTTPException, OSError):
+                self.close()
+                if attempt == 2:
+                    break
+                start = time.perf_counter()  # a dropped keep-alive connection isn't the server's latency
+        self.recorder.record(label, (time.perf_counter() - start) * 1000, status in expect)
+        return status, data
+
+    def close(self):
+        if self.conn is not None:
+            self.conn.close()
+            self.conn = None
+
+
+def basket_picker(categories, rng):
+    lines = [(item["id"], CATEGORY_WEIGHTS.get(cat["id"], 1) / len(cat["items"]))
+             for cat in categories for item in cat["items"]]
+    ids = [item_id for item_id, _ in lines]
+    weights = [w for _, w in lines]
+    sizes = list(BASKET_SIZES)
+    size_weights = list(BASKET_SIZES.values())
+
+    def pick():
+        size = rng.choices(sizes, size_weights)[0]
+        chosen = set()
+        while len(chosen) < size:
+            chosen.add(rng.choices(ids, weights)[0])
+        return {f"qty_{item_id}": str(rng.choice((1, 1, 1, 2, 2, 3))) for item_id in chosen}
+
+    return pick
+
+
+def customer(base_url, recorder, stop, args, categories, seed):
+    rng = random.Random(seed)
+    client = Client(base_url, recorder)
+    pick = basket_picker(categories, rng)
+    while not stop.is_set():
+        form = {"customer_name": f"Guest {rng.randint(1, 999)}", "table": str(rng.randint(1, 30))}
+        form.update(pick())
+        status, _ = client.request("POST /order", "POST", "/order", form)
+        if status == 200:
+            recorder.count("orders_placed")
+        stop.wait(rng.expovariate(1 / args.think))
+    client.close()
+
+
+def poll_screen(base_url, recorder, stop, args, seed):
+    client = Client(base_url, recorder)
+    etag = None
+    stop.wait(random.Random(seed).uniform(0, args.poll_interval))
+    while not stop.is_set():
+        headers = {"If-None-Match": etag} if etag else {}
+        status, _ = client.request("GET /api/orders", "GET", "/api/orders", headers=headers, expect=(200, 304))
+        if status == 200:
+            etag = client.last_headers.get("ETag")
+        stop.wait(args.poll_interval)
+    client.close()
+
+
+def stream_screen(base_url, recorder, stop, args, seed):
+    parts = urlsplit(base_url)
+    current = []  # the open connection, for the closer
+    lock = threading.Lock()
+
+    def close_on_stop():
+        # a read blocked on an idle stream only wakes for data, so end it from here
+        stop.wait()
+        with lock:
+            for conn in current:
+                if conn.sock is not None:
+                    conn.sock.shutdown(socket.SHUT_RDWR)
+
+    threading.Thread(target=close_on_stop, daemon=True).start()
+    while not stop.is_set():
+        conn = http.client.HTTPConnection(parts.hostname, parts.port or 80, timeout=STREAM_READ_TIMEOUT)
+        with lock:
+            current[:] = [conn]
+        start = time.perf_counter()
+        try:
+            conn.request("GET", "/api/orders/stream")
+            resp = conn.getresponse()
+            recorder.record("GET /api/orders/stream (connect)", (time.perf_counter() - start) * 1000,
+                            resp.status == 200)
+            while not stop.is_set():
+                # at least a keep-alive comment arrives every heartbeat; a timeout here is a real stall
+                line = resp.fp.readline()
+                if not line:
+                    break
+                if line.startswith(b"event:"):
+                    recorder.count("stream_events")
+        except (http.client.HTTPException, OSError):
+            if stop.is_set():
+                break
+            recorder.record("GET /api/orders/stream (connect)", (time.perf_counter() - start) * 1000, False)
+            stop.wait(1)
+        finally:
+            with lock:
+                current.clear()
+            conn.close()
+
+
+def staff(base_url, recorder, stop, args, index, seed):
+    """Works the orders whose id % staff == index, so staff don't race each other."""
+    rng = random.Random(seed)
+    client = Client(base_url, recorder)
+    confirmed_at = {}
+    while not stop.is_set():
+        status, data = client.request("GET /api/orders", "GET", "/api/orders")
+        orders = json.loads(data) if status == 200 else []
+        now = time.monotonic()
+        for order in orders:
+            if stop.is_set():
+                break
+            if order["id"] % args.staff != index:
+                continue
+            if order["status"] == "new":
+                rejected = [order["items"][0]["id"]] if rng.random() < REJECT_CHANCE else []
+                status, _ = client.request(
+                    "POST /api/orders/{id}/confirm", "POST", f"/api/orders/{order['id']}/confirm",
+                    json.dumps({"rejected_item_ids": rejected}),
+                    {"Content-Type": "application/json"}, expect=(200, 409),
+                )
+                if status == 200:
+                    recorder.count("orders_confirmed")
+                    confirmed_at[order["id"]] = now
+            elif order["status"] == "confirmed" and now - confirmed_at.get(order["id"], 0) >= args.cook_time:
+                status, _ = client.request(
+                    "POST /api/orders/{id}/done", "POST", f"/api/orders/{order['id']}/done", expect=(200, 409),
+                )
+                if status == 200:
+                    recorder.count("orders_done")
+                    confirmed_at.pop(order["id"], None)
+        stop.wait(0.5)
+    client.close()
+
+
+def reviewer(base_url, recorder, stop, args, seed):
+    rng = random.Random(seed)
+    client = Client(base_url, recorder)
+    while not stop.is_set():
+        client.request("GET /reviews", "GET", "/reviews")
+        status, data = client.request("GET /api/reviews", "GET", "/api/reviews")
+        pending = json.loads(data)["pending"] if status == 200 else []
+        if pending and rng.random() < REVIEW_CHANCE:
+            order = rng.choice(pending)
+            form = {"rating": str(rng.choice((3, 4, 4, 5, 5, 5))), "comment": "bench"}
+            status, _ = client.request("POST /reviews/{id}", "POST", f"/reviews/{order['id']}", form,
+                                       expect=(302, 303))
+            if status in (302, 303):
+                recorder.count("reviews_submitted")
+        stop.wait(rng.uniform(1, 3))
+    client.close()
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_server(database_url, workers):
+    port = free_port()
+    env = dict(os.environ, DATABASE_URL=database_url, PORT=str(port), WEB_CONCURRENCY=str(workers))
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "gunicorn", "-c", "gunicorn.conf.py", "app:app"],
+        cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE,
+    )
+    deadline = time.monotonic() + 60
+    while time.monotonic() < deadline:
+        if proc.poll() is not None:
+            raise SystemExit(f"gunicorn exited:\n{proc.stderr.read().decode()}")
+        try:
+            conn = http.client.HTTPConnection("127.0.0.1", port, timeout=1)
+            conn.request("GET", "/api/orders")
+            conn.getresponse().read()
+            conn.close()
+            return proc, f"http://127.0.0.1:{port}"
+        except OSError:
+            time.sleep(0.2)
+    proc.terminate()
+    raise SystemExit("gunicorn did not come up within 60s")
+
+
+def git_commit():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def print_table(report):
+    print(f"{'endpoint':<36} {'reqs':>7} {'err':>5} {'rps':>8} {'p50':>8} {'p95':>8} {'p99':>8}", file=sys.stderr)
+    for label, e in report["endpoints"].items():
+        print(f"{label:<36} {e['requests']:>7} {e['errors']:>5} {e['rps']:>8} "
+              f"{e['p50_ms']:>8} {e['p95_ms']:>8} {e['p99_ms']:>8}", file=sys.stderr)
+    print(f"total {report['requests']} requests, {report['errors']} errors, {report['rps']} req/s; "
+          + ", ".join(f"{k}={v}" for k, v in report["counters"].items()), file=sys.stderr)
+
+
+def main():
+    args = parse_args()
+    random.seed(args.seed)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        database_url = args.database_url or f"sqlite:///{os.path.join(tmp, 'rush.db')}"
+        sys.path.insert(0, ROOT)
+        import app  # only for MENU_CATEGORIES; importing it doesn't touch any database
+        categories = app.MENU_CATEGORIES
+
+        server = None
+        base_url = args.url
+        if base_url is None:
+            server, base_url = start_server(database_url, args.workers)
+
+        recorder = Recorder()
+        stop = threading.Event()
+        actors = []
+        for i in range(args.customers):
+            actors.append((customer, (base_url, recorder, stop, args, categories, args.seed * 1000 + i)))
+        for i in range(args.screens):
+            actors.append((stream_screen if args.stream else poll_screen,
+                           (base_url, recorder, stop, args, args.seed * 2000 + i)))
+        for i in range(args.staff):
+            actors.append((staff, (base_url, recorder, stop, args, i, args.seed * 3000 + i)))
+        for i in range(args.reviewers):
+            actors.append((reviewer, (base_url, recorder, stop, args, args.seed * 4000 + i)))
+
+        threads = [threading.Thread(target=fn, args=a, daemon=True) for fn, a in actors]
+        started_at = datetime.now(timezone.utc)
+        start = time.perf_counter()
+        try:
+            for t in threads:
+                t.start()
+            stop.wait(args.duration)
+        finally:
+            stop.set()
+            for t in threads:
+                t.join(timeout=35)
+            elapsed = time.perf_counter() - start
+            if server is not None:
+                server.terminate()
+                server.wait(timeout=30)
+
+    report = {
+        "benchmark": "dinner_rush",
+        "commit": git_commit(),
+        "started_at": started_at.isoformat(),
+        "target": args.url or ("postgresql" if database_url.startswith("postgres") else "sqlite"),
+        "config": {k: v for k, v in vars(args).items() if k not in ("output", "database_url", "url")},
+        **recorder.report(elapsed),
+    }
+    print_table(report)
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+    sys.exit(1 if report["errors"] else 0)
+
+
+if __name__ == "__main__":
+    main()
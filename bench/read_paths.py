@@ -0,0 +1,146 @@
+"""
+Time the history-heavy read paths as order history grows.
+
+    python bench/read_paths.py                                  # 10k and 100k orders, temporary SQLite file
+    python bench/read_paths.py --scales 10000,1000000,10000000  # the full ladder (10M takes a while to seed)
+    python bench/read_paths.py --database-url postgresql://...  # an empty local Postgres database
+
+History is seeded cumulatively with the same generator as `flask seed` (and
+archived the same way), so each scale only adds the difference. Every path is
+requested --repeat times through the Flask test client; the JSON report has
+p50/p95/max ms and the statement count per path at each scale.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--database-url", help="defaults to a temporary SQLite file")
+    parser.add_argument("--scales", default="10000,100000", help="comma separated total order counts")
+    parser.add_argument("--days", type=float, default=365, help="history spread")
+    parser.add_argument("--status-mix", default="done=93,rejected=7")
+    parser.add_argument("--active", type=int, default=40, help="open orders on the kitchen screen")
+    parser.add_argument("--review-rate", type=float, default=0.4)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--output", help="write the JSON report here instead of stdout")
+    return parser.parse_args()
+
+
+def read_paths(app):
+    """(label, url, fresh_cache) for every path we time; urls depend on the data present."""
+    today = datetime.now(app.TORONTO_TZ)
+    month_ago = (today - timedelta(days=30)).strftime("%Y-%m-%d")
+    year_ago = (today - timedelta(days=365)).strftime("%Y-%m-%d")
+    mid = app.next_free_order_id() // 2
+    session = app.SessionLocal()
+    try:
+        version = app.current_change_version(session)
+    finally:
+        session.close()
+    return [
+        ("GET /api/orders (cached)", "/api/orders", False),
+        ("GET /api/orders (rebuild)", "/api/orders", True),
+        ("GET /api/orders?since", f"/api/orders?since={max(version - 20, 0)}", True),
+        ("GET /api/prep", "/api/prep", False),
+        ("GET /reviews", "/reviews", False),
+        ("GET /reviews (deep page)", f"/reviews?pending_before={mid}&reviewed_before={mid}", False),
+        ("GET /api/reviews", "/api/reviews", False),
+        ("GET /api/analytics/sales?by=day (30d)", f"/api/analytics/sales?by=day&start={month_ago}", False),
+        ("GET /api/analytics/sales?by=item (365d)", f"/api/analytics/sales?by=item&start={year_ago}", False),
+        ("GET /api/analytics/ratings?scope=item", "/api/analytics/ratings?scope=item", False),
+        ("GET /analytics", "/analytics", False),
+    ]
+
+
+def time_path(app, client, url, fresh_cache, repeat):
+    samples = []
+    queries = None
+    client.get(url)  # warm templates and the statement cache
+    for _ in range(repeat):
+        if fresh_cache:
+            app.active_orders_cache = app.ActiveOrdersCache()
+        start = time.perf_counter()
+        resp = client.get(url)
+        samples.append((time.perf_counter() - start) * 1000)
+        if resp.status_code not in (200, 304):
+            raise SystemExit(f"{url} returned {resp.status_code}")
+        queries = int(resp.headers.get("X-Query-Count", 0))
+    samples.sort()
+    return {
+        "p50_ms": round(samples[len(samples) // 2], 2),
+        "p95_ms": round(samples[min(len(samples) - 1, int(len(samples) * 0.95))], 2),
+        "max_ms": round(samples[-1], 2),
+        "queries": queries,
+    }
+
+
+def git_commit():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    args = parse_args()
+    scales = sorted(int(s) for s in args.scales.split(","))
+
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ["DATABASE_URL"] = args.database_url or f"sqlite:///{os.path.join(tmp, 'history.db')}"
+        sys.path.insert(0, ROOT)
+        import app
+
+        app.create_app()
+        app.app.testing = True
+        client = app.app.test_client()
+        mix = app.parse_status_mix(args.status_mix)
+        seeded = app.next_free_order_id() - 1
+        results = []
+        for scale in scales:
+            start = time.perf_counter()
+            add = max(scale - seeded, 0)
+            # the kitchen's open orders go in with the first batch and stay live at every scale
+            active = args.active if scale == scales[0] else 0
+            app.import_orders(app.synthetic_orders(
+                add, args.days, mix, args.review_rate, seeded + 1, min(active, add), seed=scale,
+            ))
+            app.archive_orders(datetime.now(app.TORONTO_TZ) - timedelta(days=app.ARCHIVE_AFTER_DAYS))
+            seeded += add
+            seed_seconds = time.perf_counter() - start
+            print(f"{scale} orders (seeded {add} in {seed_seconds:.1f}s)", file=sys.stderr)
+
+            paths = {}
+            for label, url, fresh_cache in read_paths(app):
+                paths[label] = time_path(app, client, url, fresh_cache, args.repeat)
+                p = paths[label]
+                print(f"  {label:<42} p50 {p['p50_ms']:>8} ms  p95 {p['p95_ms']:>8} ms  "
+                      f"{p['queries']} queries", file=sys.stderr)
+            results.append({"orders": scale, "seed_seconds": round(seed_seconds, 1), "paths": paths})
+
+    report = {
+        "benchmark": "read_paths",
+        "commit": git_commit(),
+        "started_at": datetime.now(timezone.utc).isoformat(),
+        "database": "postgresql" if (args.database_url or "").startswith("postgres") else "sqlite",
+        "config": {k: v for k, v in vars(args).items() if k not in ("output", "database_url")},
+        "scales": results,
+    }
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main()
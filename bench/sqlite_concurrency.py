@@ -0,0 +1,98 @@
+"""
+Hammer a SQLite database from N writer processes the way gunicorn workers do:
+each process submits orders and confirms/completes them through the app's own
+write paths, and counts "database is locked" failures.
+
+    python bench/sqlite_concurrency.py --writers 8 --orders 200
+
+Exits non-zero if any write failed.
+"""
+import argparse
+import multiprocessing
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def writer(url, orders, results):
+    os.environ["DATABASE_URL"] = url
+    sys.path.insert(0, ROOT)
+    import app
+
+    app.create_app()
+    client = app.app.test_client()
+    menu = app.all_menu_items_with_category()
+    ok = errors = 0
+    for _ in range(orders):
+        try:
+            session = app.SessionLocal()
+            try:
+                items = [
+                    {
+                        "item_id": item["id"],
+                        "name": item["name"],
+                        "qty": random.randint(1, 3),
+                        "category_id": item["category_id"],
+                        "category_name": item["category_name"],
+                    }
+                    for item in random.sample(menu, 4)
+                ]
+                order_id = app.create_order(session, "Load", "T1", datetime.now(app.TORONTO_TZ), items)
+                session.commit()
+            finally:
+                session.close()
+
+            resp = client.post(f"/api/orders/{order_id}/confirm", json={"rejected_item_ids": [items[0]["item_id"]]})
+            if resp.status_code != 200:
+                raise RuntimeError(f"confirm returned {resp.status_code}")
+            resp = client.post(f"/api/orders/{order_id}/done")
+            if resp.status_code != 200:
+                raise RuntimeError(f"done returned {resp.status_code}")
+            ok += 1
+        except Exception as e:  # noqa: BLE001 - we are counting failures
+            errors += 1
+            print(f"[pid {os.getpid()}] {type(e).__name__}: {e}", file=sys.stderr)
+    results.put((ok, errors))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--writers", type=int, default=8)
+    parser.add_argument("--orders", type=int, default=200, help="orders per writer")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        url = f"sqlite:///{os.path.join(tmp, 'concurrency.db')}"
+
+        # create the schema once before the writers race for it
+        os.environ["DATABASE_URL"] = url
+        sys.path.insert(0, ROOT)
+        import app
+        app.create_app()
+        app.engine.dispose()
+
+        ctx = multiprocessing.get_context("spawn")
+        results = ctx.Queue()
+        procs = [ctx.Process(target=writer, args=(url, args.orders, results)) for _ in range(args.writers)]
+        start = time.perf_counter()
+        for p in procs:
+            p.start()
+        totals = [results.get() for _ in procs]
+        for p in procs:
+            p.join()
+        elapsed = time.perf_counter() - start
+
+    ok = sum(t[0] for t in totals)
+    errors = sum(t[1] for t in totals)
+    print(f"writers={args.writers} orders={ok + errors} ok={ok} errors={errors} "
+          f"elapsed={elapsed:.2f}s ({ok / elapsed:.0f} orders/s, 3 write transactions each)")
+    sys.exit(1 if errors else 0)
+
+
+if __name__ == "__main__":
+    main()
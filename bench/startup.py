@@ -0,0 +1,108 @@
+"""
+Cold-boot time of a worker: fresh interpreter -> import app -> create_app() ->
+first /api/orders response, measured in separate processes.
+
+    python bench/startup.py                                 # temporary SQLite file
+    python bench/startup.py --database-url postgresql://...
+    python bench/startup.py --runs 10 --budget 2
+
+The first run against a fresh database also creates the schema (the once per
+deploy step) and is reported on its own; the others are what every worker pays.
+Prints JSON and exits non-zero if the median boot-to-first-response exceeds the budget.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Runs in the child; process_s (interpreter start included) is added by the parent.
+PROBE = """
+import json, sys, time
+t0 = time.perf_counter()
+sys.path.insert(0, {root!r})
+import app
+imported = time.perf_counter()
+app.create_app()
+ready = time.perf_counter()
+resp = app.app.test_client().get("/api/orders")
+served = time.perf_counter()
+print(json.dumps({{
+    "status": resp.status_code,
+    "import_s": imported - t0,
+    "create_app_s": ready - imported,
+    "first_request_s": served - ready,
+    "import_to_first_response_s": served - t0,
+}}))
+"""
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--database-url", help="defaults to a temporary SQLite file")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--budget", type=float, default=float(os.environ.get("STARTUP_BUDGET_SECONDS", "3")),
+                        help="seconds, process start to first response (default STARTUP_BUDGET_SECONDS or 3)")
+    parser.add_argument("--output", help="write the JSON report here instead of stdout")
+    return parser.parse_args()
+
+
+def probe(database_url):
+    env = dict(os.environ, DATABASE_URL=database_url)
+    start = time.perf_counter()
+    out = subprocess.run(
+        [sys.executable, "-c", PROBE.format(root=ROOT)],
+        env=env, capture_output=True, text=True, check=True,
+    ).stdout
+    wall = time.perf_counter() - start
+    result = json.loads(out.strip().splitlines()[-1])
+    if result["status"] != 200:
+        raise SystemExit(f"/api/orders returned {result['status']}")
+    result["process_s"] = wall
+    return {k: round(v, 3) if isinstance(v, float) else v for k, v in result.items()}
+
+
+def summarize(runs):
+    keys = ("import_s", "create_app_s", "first_request_s", "import_to_first_response_s", "process_s")
+    return {
+        k: {"median": round(statistics.median(r[k] for r in runs), 3), "max": max(r[k] for r in runs)}
+        for k in keys
+    }
+
+
+def main():
+    args = parse_args()
+    with tempfile.TemporaryDirectory() as tmp:
+        database_url = args.database_url or f"sqlite:///{os.path.join(tmp, 'startup.db')}"
+        first = probe(database_url)
+        runs = [probe(database_url) for _ in range(args.runs)]
+
+    summary = summarize(runs)
+    median = summary["process_s"]["median"]
+    report = {
+        "benchmark": "startup",
+        "database": "postgresql" if (args.database_url or "").startswith("postgres") else "sqlite",
+        "budget_s": args.budget,
+        "within_budget": median <= args.budget,
+        "first_boot": first,
+        "cold_boot": summary,
+    }
+    print(f"first boot (creates schema) {first['process_s']}s; cold boot median {median}s "
+          f"(import {summary['import_s']['median']}s, create_app {summary['create_app_s']['median']}s, "
+          f"first request {summary['first_request_s']['median']}s), budget {args.budget}s", file=sys.stderr)
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+    sys.exit(0 if report["within_budget"] else 1)
+
+
+if __name__ == "__main__":
+    main()
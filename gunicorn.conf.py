@@ -0,0 +1,69 @@
+"""
+Gunicorn settings, read from the environment.
+
+Workers are asynchronous so that idle kitchen streams (/api/orders/stream)
+don't each hold a whole process:
+
+- gevent (default with Postgres): one greenlet per connection, up to
+  GUNICORN_WORKER_CONNECTIONS per worker. psycopg2 is made cooperative
+  below, so a slow query only parks its own greenlet.
+- gthread (default with SQLite): sqlite3 blocks the gevent hub while it
+  waits on busy_timeout, so SQLite gets real threads instead.
+- sync: the old behaviour, GUNICORN_WORKER_CLASS=sync.
+
+Postgres connections used at peak = WEB_CONCURRENCY x (DB_POOL_SIZE + DB_MAX_OVERFLOW)
+per dyno; keep that under the database's connection limit. Streams give their
+connection back before they start waiting, so they don't count against the pool.
+
+Metrics: each worker writes its samples under PROMETHEUS_MULTIPROC_DIR so that
+/metrics reports the whole server, not just the worker that answered.
+"""
+import glob
+import os
+import shutil
+import tempfile
+
+IS_POSTGRES = os.environ.get("DATABASE_URL", "").startswith(("postgres://", "postgresql"))
+
+worker_class = os.environ.get("GUNICORN_WORKER_CLASS", "gevent" if IS_POSTGRES else "gthread")
+
+if worker_class == "gevent":
+    # Patch before the app (and SQLAlchemy/psycopg2) is imported by preload_app.
+    from gevent import monkey
+
+    monkey.patch_all()
+
+    if IS_POSTGRES:
+        from psycogreen.gevent import patch_psycopg
+
+        patch_psycopg()
+
+# Must be set before the app (and prometheus_client) is imported. Cleared on
+# every (re)start so counters from dead workers don't linger: our own default
+# directory is recreated, an operator-supplied one only loses its *.db files.
+if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+    for name in glob.glob(os.path.join(os.environ["PROMETHEUS_MULTIPROC_DIR"], "*.db")):
+        os.remove(name)
+else:
+    os.environ["PROMETHEUS_MULTIPROC_DIR"] = os.path.join(tempfile.gettempdir(), "rdd-metrics")
+    shutil.rmtree(os.environ["PROMETHEUS_MULTIPROC_DIR"], ignore_errors=True)
+os.makedirs(os.environ["PROMETHEUS_MULTIPROC_DIR"], exist_ok=True)
+
+bind = f"0.0.0.0:{os.environ.get('PORT', '8000')}"
+workers = int(os.environ.get("WEB_CONCURRENCY", "2"))
+threads = int(os.environ.get("GUNICORN_THREADS", "32"))  # gthread only
+worker_connections = int(os.environ.get("GUNICORN_WORKER_CONNECTIONS", "1000"))  # gevent only
+timeout = int(os.environ.get("GUNICORN_TIMEOUT", "30"))
+keepalive = 5
+
+# Import the app and run create_app() once in the master so workers fork with
+# it already loaded and the schema already checked. The engine's pool is reset
+# in each child (see os.register_at_fork in app.py). Migrations themselves run
+# in the Procfile release step; set AUTO_MIGRATE=0 to leave them to it.
+preload_app = os.environ.get("GUNICORN_PRELOAD", "1").lower() in ("1", "true", "yes", "on")
+
+
+def child_exit(server, worker):
+    from prometheus_client import multiprocess
+
+    multiprocess.mark_process_dead(worker.pid)
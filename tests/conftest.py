@@ -0,0 +1,46 @@
+import os
+import sys
+import tempfile
+
+import pytest
+
+# app reads its configuration at import time
+_tmp = tempfile.mkdtemp(prefix="rdd-tests-")
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_tmp, 'test.db')}"
+os.environ.setdefault("CHANGE_BUS", "inprocess")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import app as app_module  # noqa: E402
+
+
+@pytest.fixture
+def app():
+    """The app against an empty database (schema, migrations and change counter kept)."""
+    app_module.create_app()
+    app_module.app.testing = True
+    keep = {"schema_migrations", "change_versions"}
+    with app_module.engine.begin() as conn:
+        for table in reversed(app_module.Base.metadata.sorted_tables):
+            if table.name not in keep:
+                conn.execute(table.delete())
+    yield app_module
+
+
+@pytest.fixture
+def client(app):
+    return app.app.test_client()
+
+
+@pytest.fixture
+def place_order(app, client):
+    """Submit the order form with {menu_item_id: qty}; returns the new order id."""
+    def place(items, customer_name="Test", table="4"):
+        form = {"customer_name": customer_name, "table": table}
+        form.update({f"qty_{item_id}": qty for item_id, qty in items.items()})
+        assert client.post("/order", data=form).status_code == 200
+        session = app.SessionLocal()
+        try:
+            return session.execute(app.select(app.func.max(app.Order.id))).scalar()
+        finally:
+            session.close()
+    return place
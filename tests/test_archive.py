@@ -0,0 +1,56 @@
+import sqlite3
+import threading
+from datetime import datetime, timedelta
+
+from sqlalchemy import event, func, select
+
+
+def finish_all(app):
+    with app.engine.begin() as conn:
+        conn.execute(app.Order.__table__.update().values(status="done"))
+
+
+def test_archiving_everything_never_reuses_order_ids(app, place_order):
+    place_order({1: 2})
+    place_order({2: 1})
+    finish_all(app)
+    tomorrow = datetime.now(app.TORONTO_TZ) + timedelta(days=1)
+    assert app.archive_orders(tomorrow) == 2
+
+    place_order({1: 1})
+    with app.engine.connect() as conn:
+        live = conn.execute(select(app.Order.id)).scalars().all()
+        archived = conn.execute(select(func.max(app.ArchivedOrder.id))).scalar()
+    assert len(live) == 1 and live[0] > archived
+
+    finish_all(app)
+    assert app.archive_orders(tomorrow) == 1
+    with app.engine.connect() as conn:
+        assert conn.execute(select(func.count()).select_from(app.ArchivedOrder)).scalar() == 3
+        assert conn.execute(select(func.count()).select_from(app.ArchivedOrderItem)).scalar() == 3
+
+
+def test_archive_batch_waits_for_a_concurrent_kitchen_write(app, place_order):
+    place_order({1: 1})
+    finish_all(app)
+    writer = []
+
+    def kitchen_write():
+        db = sqlite3.connect(app.engine.url.database, timeout=5)
+        db.execute("UPDATE change_versions SET value = value + 1")
+        db.commit()
+        db.close()
+
+    def commit_between_select_and_insert(conn, cursor, statement, *args):
+        # another process's write lands after the batch SELECT, before its INSERT
+        if not writer and statement.lstrip().startswith("SELECT orders.id"):
+            writer.append(threading.Thread(target=kitchen_write))
+            writer[0].start()
+            writer[0].join(0.2)
+
+    event.listen(app.engine, "after_cursor_execute", commit_between_select_and_insert)
+    try:
+        assert app.archive_orders(datetime.now(app.TORONTO_TZ) + timedelta(days=1)) == 1
+    finally:
+        event.remove(app.engine, "after_cursor_execute", commit_between_select_and_insert)
+        writer[0].join()
@@ -0,0 +1,50 @@
+from datetime import datetime, timedelta
+
+from sqlalchemy import func, select
+
+
+def history(app, first_id, days_ago, status="done", review=None):
+    created = datetime.now(app.TORONTO_TZ) - timedelta(days=days_ago)
+    return {
+        "id": first_id,
+        "customer_name": "Old",
+        "table": "2",
+        "status": status,
+        "created_at": created.isoformat(),
+        "items": [{"item_id": 401, "qty": 2}, {"item_id": 1, "qty": 1}],
+        "review": review,
+    }
+
+
+def count(conn, model):
+    return conn.execute(select(func.count()).select_from(model)).scalar()
+
+
+def test_old_finished_orders_are_imported_into_the_archive(app, place_order):
+    days = app.ARCHIVE_AFTER_DAYS
+    counts = app.import_orders([
+        history(app, 1, days + 30, review={"rating": 5}),
+        history(app, 2, days + 10, status="rejected"),
+        history(app, 3, 0),                          # recent: stays live for the reviews page
+        history(app, 4, days + 5, status="confirmed"),  # still open: the kitchen needs it
+    ])
+    assert counts["imported"] == 4 and counts["lines"] == 8
+
+    with app.engine.connect() as conn:
+        assert conn.execute(select(app.ArchivedOrder.id).order_by(app.ArchivedOrder.id)).scalars().all() == [1, 2]
+        assert conn.execute(select(app.Order.id).order_by(app.Order.id)).scalars().all() == [3, 4]
+        assert count(conn, app.ArchivedOrderItem) == 4 and count(conn, app.ArchivedReview) == 1
+        assert count(conn, app.OrderItem) == 4
+        # archived sales still count in the rollup
+        sold = conn.execute(select(func.sum(app.SalesHourly.qty)).where(app.SalesHourly.item_id == 401)).scalar()
+    assert sold == 2 + 2  # the two done orders, 1 archived and 3 live
+
+    # re-running the file is a no-op, and new orders and lines never reuse an archived id
+    assert app.import_orders([history(app, 1, days + 30)])["skipped"] == 1
+    new_id = place_order({401: 1})
+    assert new_id > 4
+    with app.engine.begin() as conn:
+        conn.execute(app.Order.__table__.update().values(status="done"))
+    assert app.archive_orders(datetime.now(app.TORONTO_TZ) + timedelta(days=1)) == 3
+    with app.engine.connect() as conn:
+        assert count(conn, app.ArchivedOrderItem) == 4 + 2 + 2 + 1
@@ -0,0 +1,21 @@
+from sqlalchemy import create_engine, inspect, text
+
+
+def test_migrations_alone_build_the_schema_the_models_describe(app, tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'fresh.db'}")
+    try:
+        assert app.run_migrations(engine) == [version for version, _, _ in app.MIGRATIONS]
+        assert app.run_migrations(engine) == []
+
+        db = inspect(engine)
+        assert set(db.get_table_names()) == set(app.Base.metadata.tables)
+        for table in app.Base.metadata.sorted_tables:
+            assert [c["name"] for c in db.get_columns(table.name)] == [c.name for c in table.columns], table.name
+            assert db.get_pk_constraint(table.name)["constrained_columns"] == [c.name for c in table.primary_key]
+            assert {i["name"] for i in db.get_indexes(table.name)} == {i.name for i in table.indexes}, table.name
+
+        with engine.connect() as conn:
+            sql = conn.execute(text("SELECT group_concat(sql) FROM sqlite_master WHERE name IN ('orders', 'order_items')"))
+            assert sql.scalar().count("AUTOINCREMENT") == 2
+    finally:
+        engine.dispose()
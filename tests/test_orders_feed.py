@@ -0,0 +1,71 @@
+def review(client, order_id, rating=5):
+    assert client.post(f"/reviews/{order_id}", data={"rating": str(rating), "comment": "ok"}).status_code == 302
+
+
+def test_reviews_leave_the_kitchen_version_alone(app, client, place_order):
+    done_id = place_order({401: 1})
+    client.post(f"/api/orders/{done_id}/done")
+    place_order({1: 1})
+    first = client.get("/api/orders")
+    prep = client.get("/api/prep")
+
+    review(client, done_id)
+
+    assert client.get("/api/orders", headers={"If-None-Match": first.headers["ETag"]}).status_code == 304
+    assert client.get("/api/prep", headers={"If-None-Match": prep.headers["ETag"]}).status_code == 304
+    # the cache wasn't thrown away either: no database access at all
+    assert client.get("/api/orders").headers["X-Query-Count"] == "0"
+
+
+def feed_version(client):
+    """The current ?since cursor (any out-of-range cursor gets a reset carrying it)."""
+    return client.get("/api/orders?since=-1").json["version"]
+
+
+def test_matching_etag_gets_304_until_the_orders_change(app, client, place_order):
+    place_order({401: 1})
+    first = client.get("/api/orders")
+    assert first.status_code == 200 and first.headers["ETag"]
+
+    again = client.get("/api/orders", headers={"If-None-Match": first.headers["ETag"]})
+    assert again.status_code == 304 and again.data == b""
+
+    place_order({1: 1})
+    changed = client.get("/api/orders", headers={"If-None-Match": first.headers["ETag"]})
+    assert changed.status_code == 200 and changed.headers["ETag"] != first.headers["ETag"]
+    assert len(changed.json) == 2
+
+
+def test_since_returns_changed_orders_and_removed_ids(app, client, place_order):
+    untouched, confirmed, finished = place_order({401: 1}), place_order({1: 1}), place_order({201: 1})
+    since = feed_version(client)
+
+    client.post(f"/api/orders/{confirmed}/confirm", json={"rejected_item_ids": []})
+    client.post(f"/api/orders/{finished}/done")
+    placed = place_order({401: 2})
+
+    feed = client.get(f"/api/orders?since={since}").json
+    assert feed["reset"] is False
+    assert [o["id"] for o in feed["orders"]] == [confirmed, placed]
+    assert feed["orders"][0]["status"] == "confirmed"
+    assert feed["removed"] == [finished]
+    assert untouched not in feed["removed"]
+
+    caught_up = client.get(f"/api/orders?since={feed['version']}").json
+    assert caught_up["orders"] == [] and caught_up["removed"] == [] and caught_up["reset"] is False
+
+
+def test_cursor_older_than_the_change_log_gets_a_reset(app, client, place_order):
+    since = feed_version(client)
+    ids = [place_order({401: 1}) for _ in range(3)]
+    # what ORDER_CHANGE_RETENTION pruning does to old versions
+    with app.engine.begin() as conn:
+        conn.execute(app.OrderChange.__table__.delete().where(app.OrderChange.version <= since + 2))
+
+    feed = client.get(f"/api/orders?since={since}").json
+    assert feed["reset"] is True and feed["removed"] == []
+    assert [o["id"] for o in feed["orders"]] == ids
+    # still covered by the log: just the last order
+    assert [o["id"] for o in client.get(f"/api/orders?since={since + 2}").json["orders"]] == ids[-1:]
+    # a cursor from the future (e.g. another database) resets too
+    assert client.get(f"/api/orders?since={feed['version'] + 1}").json["reset"] is True
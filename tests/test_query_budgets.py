@@ -0,0 +1,51 @@
+from datetime import datetime, timedelta
+
+# url -> QUERY_BUDGETS key
+BUDGETED_URLS = {
+    "/api/orders": "api_orders",
+    "/api/orders?station=tandoor": "api_orders",
+    "/api/orders?since=0": "api_orders",
+    "/api/orders/stream": "api_orders_stream",
+    "/reviews": "reviews_page",
+    "/api/reviews": "api_reviews",
+    "/api/prep": "api_prep",
+}
+
+
+def seed(app, count, first_id):
+    """History over three days, so live and archived orders, reviewed and not, plus open ones."""
+    app.import_orders(app.synthetic_orders(
+        count, days=3, status_mix={"done": 9, "rejected": 1}, review_rate=0.5,
+        first_id=first_id, active=max(count // 5, 1), seed=count,
+    ))
+    app.archive_orders(datetime.now(app.TORONTO_TZ) - timedelta(days=app.ARCHIVE_AFTER_DAYS))
+
+
+def count_queries(app, client, url):
+    app.active_orders_cache = app.ActiveOrdersCache()  # measure the rebuild, not a cache hit
+    with app.QueryCounter() as qc:
+        resp = client.get(url, buffered=False)
+        assert resp.status_code == 200
+        if url == "/api/orders/stream":
+            next(resp.response)  # the snapshot is read before the first chunk
+        resp.close()
+    return qc.count
+
+
+def test_budgeted_endpoints_stay_within_budget_as_history_grows(app, client):
+    seed(app, 30, 1)
+    small = {url: count_queries(app, client, url) for url in BUDGETED_URLS}
+    seed(app, 270, 31)
+    large = {url: count_queries(app, client, url) for url in BUDGETED_URLS}
+
+    for url, endpoint in BUDGETED_URLS.items():
+        assert large[url] <= app.QUERY_BUDGETS[endpoint], (url, large[url])
+        assert large[url] == small[url], (url, small[url], large[url])
+
+
+def test_change_bus_startup_is_not_charged_to_the_first_request(app, client, place_order, monkeypatch):
+    place_order({401: 1})
+    for url in ("/api/orders", "/api/orders/stream"):
+        monkeypatch.setattr(app, "change_bus", app.ChangeLogBus(poll_interval=60))
+        first = count_queries(app, client, url)
+        assert first == count_queries(app, client, url) <= app.QUERY_BUDGETS[BUDGETED_URLS[url]]
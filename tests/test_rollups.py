@@ -0,0 +1,96 @@
+from datetime import datetime, timedelta
+
+from sqlalchemy import select
+
+ROTI = 401    # tandoor
+CURRY = 1     # curry station
+
+
+def rows(app, model):
+    """A rollup table as sorted tuples, leaving out rows that net to zero."""
+    table = model.__table__
+    counters = [c for c in table.columns if c.name in ("qty", "orders", "reviews", "rating_sum")]
+    with app.engine.connect() as conn:
+        result = conn.execute(select(table).order_by(*table.primary_key.columns)).all()
+    return [tuple(r) for r in result if any(r._mapping[c.name] for c in counters)]
+
+
+def rating(app, scope, key):
+    with app.engine.connect() as conn:
+        r = conn.execute(
+            select(app.RatingRollup.reviews, app.RatingRollup.rating_sum)
+            .where(app.RatingRollup.scope == scope, app.RatingRollup.key == key)
+        ).first()
+    return tuple(r) if r else (0, 0)
+
+
+def review(client, order_id, rating):
+    assert client.post(f"/reviews/{order_id}", data={"rating": rating, "comment": ""}).status_code == 302
+
+
+def test_done_order_is_added_to_the_hourly_and_daily_sales(app, client, place_order):
+    first = place_order({ROTI: 2, CURRY: 1})
+    second = place_order({ROTI: 3})
+    place_order({ROTI: 5})  # never done: not sold
+    client.post(f"/api/orders/{first}/done")
+    client.post(f"/api/orders/{second}/done")
+
+    for model in (app.SalesHourly, app.SalesDaily):
+        sold = {r[1]: (r[-2], r[-1]) for r in rows(app, model)}  # item_id: (qty, orders)
+        assert sold == {ROTI: (5, 2), CURRY: (1, 1)}, model.__tablename__
+
+    report = client.get("/api/analytics/sales?by=item").json["rows"]
+    assert {r["item_id"]: (r["qty"], r["orders"]) for r in report} == {ROTI: (5, 2), CURRY: (1, 1)}
+    by_day = client.get("/api/analytics/sales?by=day").json["rows"]
+    by_hour = client.get("/api/analytics/sales?by=hour").json["rows"]
+    assert sum(r["qty"] for r in by_day) == sum(r["qty"] for r in by_hour) == 6
+
+
+def test_edited_review_moves_the_rating_sum_only(app, client, place_order):
+    order_id = place_order({ROTI: 1, CURRY: 1})
+    client.post(f"/api/orders/{order_id}/done")
+
+    review(client, order_id, "5")
+    assert rating(app, "all", "*") == (1, 5)
+    review(client, order_id, "2")
+    assert rating(app, "all", "*") == (1, 2)
+    assert rating(app, "item", str(ROTI)) == (1, 2)
+    assert rating(app, "category", app.MENU.by_id[CURRY]["category_id"]) == (1, 2)
+
+
+def test_cleared_rating_stops_counting_the_review(app, client, place_order):
+    rated, cleared = place_order({ROTI: 1}), place_order({ROTI: 1})
+    for order_id in (rated, cleared):
+        client.post(f"/api/orders/{order_id}/done")
+        review(client, order_id, "4")
+    assert rating(app, "item", str(ROTI)) == (2, 8)
+
+    review(client, cleared, "")
+    assert rating(app, "item", str(ROTI)) == (1, 4)
+    ratings = client.get("/api/analytics/ratings?scope=all").json["rows"]
+    assert [(r["reviews"], r["avg_rating"]) for r in ratings] == [(1, 4.0)]
+
+
+def test_backfill_rebuilds_what_the_incremental_path_built(app, client, place_order):
+    days = app.ARCHIVE_AFTER_DAYS
+    old = (datetime.now(app.TORONTO_TZ) - timedelta(days=days + 3)).isoformat()
+    app.import_orders([
+        {"id": 1, "customer_name": "Old", "table": "2", "status": "done", "created_at": old,
+         "items": [{"item_id": ROTI, "qty": 2}, {"item_id": CURRY, "qty": 1}], "review": {"rating": 3}},
+    ])
+    ids = [place_order({ROTI: 1, CURRY: n}) for n in (1, 2, 3)]
+    for order_id in ids:
+        client.post(f"/api/orders/{order_id}/done")
+    review(client, ids[0], "5")
+    review(client, ids[1], "1")
+    review(client, ids[1], "4")
+    review(client, ids[2], "2")
+    review(client, ids[2], "")
+
+    models = (app.SalesHourly, app.SalesDaily, app.RatingRollup)
+    incremental = {model: rows(app, model) for model in models}
+    assert all(incremental.values())
+
+    app.backfill_rollups()
+    for model in models:
+        assert rows(app, model) == incremental[model], model.__tablename__
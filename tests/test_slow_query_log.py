@@ -0,0 +1,11 @@
+def test_only_plain_statements_are_explained(app):
+    raw = app.engine.raw_connection()
+    try:
+        cursor = raw.cursor()
+        plan = app.explain_statement(cursor, "SELECT id FROM orders WHERE status = ?", ("new",))
+        assert "ix_orders_status_id" in plan
+        cte_write = "WITH gone AS (DELETE FROM orders RETURNING id) SELECT count(*) FROM gone"
+        assert app.explain_statement(cursor, cte_write, ()) is None
+        assert app.explain_statement(cursor, "PRAGMA table_info(orders)", ()) is None
+    finally:
+        raw.close()
@@ -0,0 +1,64 @@
+ROTI = 401    # tandoor
+RAITA = 201   # cold
+CURRY = 1     # curry
+
+
+def order_status(app, order_id):
+    session = app.SessionLocal()
+    try:
+        return session.get(app.Order, order_id).status
+    finally:
+        session.close()
+
+
+def test_order_is_confirmed_once_every_station_has_confirmed(app, client, place_order):
+    order_id = place_order({ROTI: 2, RAITA: 1})
+
+    resp = client.post(f"/api/orders/{order_id}/confirm?station=tandoor", json={})
+    assert resp.status_code == 200 and resp.json["status"] == "new"
+
+    # the other station can still act; the first one has nothing left to confirm
+    assert client.post(f"/api/orders/{order_id}/confirm?station=tandoor", json={}).status_code == 409
+    resp = client.post(f"/api/orders/{order_id}/confirm?station=cold", json={})
+    assert resp.status_code == 200 and resp.json["status"] == "confirmed"
+
+    # a whole-order confirm after that is a conflict, as before
+    assert client.post(f"/api/orders/{order_id}/confirm", json={}).status_code == 409
+
+
+def test_station_rejecting_its_lines_keeps_the_rest(app, client, place_order):
+    order_id = place_order({ROTI: 1, RAITA: 1})
+    client.post(f"/api/orders/{order_id}/confirm?station=cold", json={"rejected_item_ids": [RAITA]})
+    resp = client.post(f"/api/orders/{order_id}/confirm?station=tandoor", json={})
+    assert resp.json["status"] == "confirmed"
+    (order,) = client.get("/api/orders").json
+    assert [it["id"] for it in order["items"]] == [ROTI]
+
+
+def test_station_done_only_finishes_its_own_lines(app, client, place_order):
+    order_id = place_order({ROTI: 1, RAITA: 1, CURRY: 1})
+    client.post(f"/api/orders/{order_id}/confirm", json={})
+
+    resp = client.post(f"/api/orders/{order_id}/done?station=tandoor")
+    assert resp.status_code == 200 and resp.json["status"] == "confirmed"
+    assert client.get("/api/orders?station=tandoor").json == []
+    (cold,) = client.get("/api/orders?station=cold").json
+    assert [it["status"] for it in cold["items"]] == ["confirmed"]
+    assert client.post(f"/api/orders/{order_id}/done?station=tandoor").status_code == 409
+
+    resp = client.post("/api/orders/batch?station=cold", json={"actions": [{"order_id": order_id, "action": "done"}]})
+    assert resp.json["results"][0]["status"] == "confirmed"
+    resp = client.post(f"/api/orders/{order_id}/done?station=curry")
+    assert resp.json["status"] == "done"
+    assert order_status(app, order_id) == "done"
+    assert client.get("/api/orders").json == []
+
+
+def test_whole_order_actions_are_set_based(app, client, place_order):
+    # order UPDATE + line UPDATE (+ rejected-line DELETE, or the hourly and daily sales rollups) + the change record
+    order_id = place_order({ROTI: 1, RAITA: 1})
+    resp = client.post(f"/api/orders/{order_id}/confirm", json={"rejected_item_ids": [RAITA]})
+    assert resp.json["status"] == "confirmed" and int(resp.headers["X-Query-Count"]) <= 5
+    resp = client.post(f"/api/orders/{order_id}/done")
+    assert resp.json["status"] == "done" and int(resp.headers["X-Query-Count"]) <= 6
+    assert client.post(f"/api/orders/{order_id}/done").status_code == 409